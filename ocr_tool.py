@@ -1,19 +1,27 @@
 from __future__ import annotations
 import time
-import imagehash  # type: ignore
+import mss  # type: ignore
 
-# from tesserocr import PyTessBaseAPI, PSM, OEM  # type: ignore
+try:
+    from tesserocr import PyTessBaseAPI, OEM  # type: ignore
+except ImportError:
+    PyTessBaseAPI = None
 
 import contextlib
+import hashlib
+import json
 import signal
-
-from typing import Union
-
+import statistics
+import threading
+import tracemalloc
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
 
 import cv2  # type: ignore
+import doxapy  # type: ignore
 
 import appdirs
 import copy
+import glob
 import io
 import itertools
 import os
@@ -22,11 +30,15 @@ import platform
 import re
 import shutil
 import math
+import multiprocessing
 import sys
-from collections import deque
+import unicodedata
+from collections import OrderedDict, deque
+from enum import Enum
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from shutil import which
 from tempfile import NamedTemporaryFile
-from typing import Any, Optional, cast
+from typing import Any, Callable, List, Optional, cast
 import subprocess
 
 
@@ -40,21 +52,35 @@ import typer
 from appdirs import user_config_dir
 from easyprocess import EasyProcess  # type: ignore
 from loguru import logger
-from PIL import Image, ImageOps, ImageGrab
+from PIL import Image, ImageGrab
 from PIL.ImageQt import ImageQt
 from pynput import keyboard  # type: ignore
-from PySide6.QtCore import QBuffer, QObject, QRect, Qt, QThread, Signal, SignalInstance, QMimeData, QUrl, Slot
+from PySide6.QtCore import (
+    QBuffer,
+    QMimeData,
+    QObject,
+    QPoint,
+    QRect,
+    Qt,
+    QThread,
+    QTimer,
+    QUrl,
+    Signal,
+    SignalInstance,
+    Slot,
+)
 from PySide6.QtGui import (
     QAction,
     QColor,
     QCursor,
     QIcon,
+    QImage,
     QKeySequence,
     QMouseEvent,
     QPainter,
-    QPainterPath,
     QPaintEvent,
     QPixmap,
+    QScreen,
 )
 from PySide6.QtWidgets import (
     QApplication,
@@ -216,7 +242,7 @@ def merge(a, b, path=None):
 
 
 class Configuration:
-    def __init__(self) -> None:
+    def __init__(self, load_user_config: bool = True) -> None:
         default_settings = {
             "hotkeys": {
                 "single_screenshot_hotkey": "<ctrl>+<alt>+Q",
@@ -230,16 +256,88 @@ class Configuration:
             "auto_save_recording": False,
             "recording_seconds": 8,
             "enable_srs_image": True,
+            "srs_image": {
+                # webp, jpeg or png
+                "format": "webp",
+                "quality": 75,
+                # webp method (0-6) or png compression level (0-9), higher is smaller and slower
+                "effort": 4,
+                "max_width": 848,
+                "max_height": 480,
+                # every srs image is also saved to this directory when it's set
+                "export_directory": "",
+                # grab the srs region every frame_buffer_interval seconds and keep the last frame_buffer_size
+                # frames, hotkeys then use the frame closest to their ocr instead of grabbing the screen again
+                "enable_frame_buffer": False,
+                "frame_buffer_interval": 0.5,
+                "frame_buffer_size": 4,
+            },
             "ocr_settings": {
                 "upscale_amount": 3,
+                # pick the upscale amount that brings the glyph height into this range instead of upscale_amount
+                "auto_upscale": False,
+                "min_glyph_height": 40,
+                "max_glyph_height": 80,
                 "enable_thresholding": True,
                 "thresholding_value": 130,
+                # manual, otsu, adaptive or sauvola, the automatic ones run before upscaling
+                "thresholding_method": "manual",
                 "smart_image_inversion": True,
                 "add_border": True,
+                # only process the area of the capture that contains text
+                "crop_to_text": False,
+                # "subprocess" runs the tesseract binary per OCR, "tesserocr" keeps the models loaded in-process
+                # and needs the tesserocr extra
+                "ocr_engine": "subprocess",
+                # split large images into text lines/columns and ocr them on all cores
+                "enable_tiled_ocr": False,
+                "tiled_ocr_min_pixels": 1500000,
+                # ocr horizontal and vertical text at the same time and keep the more confident result
+                "speculative_orientation": False,
+                # ocr several preprocessing variants in parallel and keep the most confident result
+                "enable_best_of_variants": False,
+                "variant_thresholding_values": [96, 128, 160],
+            },
+            "text_normalization": {
+                # replacements applied to every ocr result, on top of the built-in ones
+                "rules": {},
+                # replacements per game, only the ones of active_game are applied
+                "game_rules": {},
+                "active_game": "",
+            },
+            "auto_ocr": {
+                # seconds between checks, shortest while the region changes and doubling while it's idle, the
+                # next line is noticed at most max_interval + settle_seconds after it appears
+                "min_interval": 0.1,
+                "max_interval": 0.5,
+                # the ocr runs once the region stopped changing for this long, or every max_settle_seconds
+                # while it keeps changing (an animated background), leaving it to skip_unchanged_text
+                "settle_seconds": 0.3,
+                "max_settle_seconds": 3.0,
+                # the region is compared as small thumbnails of tile_size pixel tiles, so a single new glyph
+                # shows up while noise below tile_tolerance gray levels doesn't
+                "tile_size": 32,
+                "tile_tolerance": 8,
+                # skip the ocr when the binarized text looks like the last ocr's, up to text_tolerance_cells
+                # changed 2x2 pixel cells are taken as capture noise, a single changed glyph is several times that
+                "skip_unchanged_text": True,
+                "text_tolerance_cells": 1,
+            },
+            "metrics": {
+                "enable_endpoint": False,
+                "port": 9465,
+            },
+            "ocr_cache": {
+                "max_entries": 256,
+                "enable_disk_cache": False,
+                "max_disk_entries": 10000,
             },
         }
         self.config_dict: dict[str, Any]
-        self.config_dict = self.load_config(default_settings)
+        if load_user_config:
+            self.config_dict = self.load_config(default_settings)
+        else:
+            self.config_dict = default_settings
 
     def load_config(self, default_settings) -> dict[str, Any]:
         config_dir = user_config_dir("migaku-ocr")
@@ -265,6 +363,193 @@ class Configuration:
             tomli_w.dump(self.config_dict, f)
 
 
+class Metrics:
+    """Latency histograms per pipeline stage and event counters, shared by the whole process"""
+
+    HISTOGRAM_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, window_size: int = 200) -> None:
+        self.lock = threading.Lock()
+        # the last window_size durations of every stage, used for the quantiles
+        self.recent_durations: dict[str, deque] = {}
+        self.bucket_counts: dict[str, list[int]] = {}
+        self.duration_sums: dict[str, float] = {}
+        self.duration_counts: dict[str, int] = {}
+        self.counters: dict[str, int] = {}
+        self.window_size = window_size
+
+    def observe(self, stage: str, seconds: float):
+        with self.lock:
+            if stage not in self.recent_durations:
+                self.recent_durations[stage] = deque(maxlen=self.window_size)
+                self.bucket_counts[stage] = [0] * len(self.HISTOGRAM_BUCKETS)
+                self.duration_sums[stage] = 0.0
+                self.duration_counts[stage] = 0
+            self.recent_durations[stage].append(seconds)
+            for index, bucket in enumerate(self.HISTOGRAM_BUCKETS):
+                if seconds <= bucket:
+                    self.bucket_counts[stage][index] += 1
+            self.duration_sums[stage] += seconds
+            self.duration_counts[stage] += 1
+
+    @contextlib.contextmanager
+    def measure(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def increment(self, counter: str, amount: int = 1):
+        with self.lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def get_stage_summaries(self) -> dict[str, dict[str, float]]:
+        with self.lock:
+            recent_durations = {stage: list(durations) for stage, durations in self.recent_durations.items()}
+        return {
+            stage: {
+                "count": len(durations),
+                "p50": float(numpy.percentile(durations, 50)),
+                "p95": float(numpy.percentile(durations, 95)),
+                "max": max(durations),
+            }
+            for stage, durations in recent_durations.items()
+        }
+
+    def get_counters(self) -> dict[str, int]:
+        with self.lock:
+            return dict(self.counters)
+
+    def to_prometheus_text(self) -> str:
+        histogram = "migaku_ocr_stage_duration_seconds"
+        lines = [
+            f"# HELP {histogram} Duration of the OCR pipeline stages",
+            f"# TYPE {histogram} histogram",
+        ]
+        with self.lock:
+            for stage, bucket_counts in self.bucket_counts.items():
+                for bucket, count in zip(self.HISTOGRAM_BUCKETS, bucket_counts):
+                    lines.append(f'{histogram}_bucket{{stage="{stage}",le="{bucket}"}} {count}')
+                lines.append(f'{histogram}_bucket{{stage="{stage}",le="+Inf"}} {self.duration_counts[stage]}')
+                lines.append(f'{histogram}_sum{{stage="{stage}"}} {self.duration_sums[stage]}')
+                lines.append(f'{histogram}_count{{stage="{stage}"}} {self.duration_counts[stage]}')
+        lines.append("# HELP migaku_ocr_recent_stage_duration_seconds Quantiles over the most recent stage durations")
+        lines.append("# TYPE migaku_ocr_recent_stage_duration_seconds gauge")
+        for stage, summary in self.get_stage_summaries().items():
+            for quantile in ["p50", "p95", "max"]:
+                lines.append(
+                    f'migaku_ocr_recent_stage_duration_seconds{{stage="{stage}",quantile="{quantile}"}} '
+                    f"{summary[quantile]}"
+                )
+        for counter, value in sorted(self.get_counters().items()):
+            lines.append(f"# TYPE migaku_ocr_{counter}_total counter")
+            lines.append(f"migaku_ocr_{counter}_total {value}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+class MetricsServer:
+    """Serves the metrics in the prometheus text format on localhost"""
+
+    def __init__(self, port: int) -> None:
+        class MetricsRequestHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = metrics.to_prometheus_text().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), MetricsRequestHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        logger.info(f"serving metrics on http://127.0.0.1:{self.server.server_port}/metrics")
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class ScreenCapture:
+    """Grabs screen regions through one long-lived mss connection instead of a new one per grab"""
+
+    def __init__(self) -> None:
+        # the display connection belongs to the thread that opened it, so all grabs run on one worker thread
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="screen-capture")
+        # on X11 mss grabs into a shared memory segment it keeps for the whole connection and copies the region
+        # out of it once, everything after that works on views of this copy
+        self.sct: Optional[Any] = None
+
+    def grab_array(self, bbox: tuple[int, int, int, int]) -> numpy.ndarray:
+        """Returns the region as a BGRA array of the bbox's size, a view of the grabbed buffer on unscaled screens"""
+        return self.executor.submit(self.grab_in_worker, bbox).result()
+
+    def grab(self, bbox: tuple[int, int, int, int]) -> Image.Image:
+        array = self.grab_array(bbox)
+        height, width = array.shape[:2]
+        # the only copy, which also drops the padding byte
+        return Image.frombuffer("RGB", (width, height), array, "raw", "BGRX", 0, 1)
+
+    def grab_in_worker(self, bbox: tuple[int, int, int, int]) -> numpy.ndarray:
+        if self.sct is None:
+            self.sct = mss.mss()
+        x1, y1, x2, y2 = bbox
+        region = {"left": x1, "top": y1, "width": x2 - x1, "height": y2 - y1}
+        try:
+            screenshot = self.sct.grab(region)
+        except mss.ScreenShotError:
+            # the shared memory segment has the size the screen had when it was created
+            logger.debug("screen capture failed, reconnecting")
+            self.sct.close()
+            self.sct = mss.mss()
+            screenshot = self.sct.grab(region)
+        array = numpy.frombuffer(screenshot.raw, numpy.uint8).reshape(screenshot.height, screenshot.width, 4)
+        if (screenshot.width, screenshot.height) != (region["width"], region["height"]):
+            # on scaled screens (Retina) mss grabs physical pixels, everything else works in the bbox's logical
+            # pixels like ImageGrab did
+            array = cv2.resize(array, (region["width"], region["height"]), interpolation=cv2.INTER_AREA)  # type: ignore
+        return array
+
+    def close(self):
+        if self.sct is not None:
+            self.executor.submit(self.sct.close).result()
+            self.sct = None
+        self.executor.shutdown()
+
+
+screen_capture = ScreenCapture()
+
+
+def compute_tile_hashes(image: numpy.ndarray, tile_size: int) -> numpy.ndarray:
+    """Returns an 8x8 grayscale thumbnail for every tile_size x tile_size tile of a BGRA image"""
+    height, width = image.shape[:2]
+    rows = max(1, round(height / tile_size))
+    columns = max(1, round(width / tile_size))
+    # a single area resize to 8x8 pixels per tile is the only full resolution pass
+    small = cv2.resize(image, (columns * 8, rows * 8), interpolation=cv2.INTER_AREA)  # type: ignore
+    small = cv2.cvtColor(small, cv2.COLOR_BGRA2GRAY)  # type: ignore
+    return small.reshape(rows, 8, columns, 8).swapaxes(1, 2).reshape(rows, columns, 64)
+
+
+def count_changed_tiles(previous_hashes: numpy.ndarray, hashes: numpy.ndarray, tolerance: int) -> int:
+    """Counts the tiles with a thumbnail pixel that changed by more than tolerance"""
+    if previous_hashes.shape != hashes.shape:
+        return hashes.shape[0] * hashes.shape[1]
+    return int(numpy.count_nonzero((cv2.absdiff(previous_hashes, hashes) > tolerance).any(axis=2)))  # type: ignore
+
+
 valid_keys = {
     Qt.Key_0: "0",
     Qt.Key_1: "1",
@@ -396,7 +681,7 @@ class MainWindow(QWidget):
         def toggle_thresholding(state):
             if state == Qt.Checked:
                 self.config.config_dict["ocr_settings"]["enable_thresholding"] = True
-                self.thresholding_slider.setEnabled(True)
+                self.thresholding_slider.setEnabled(self.thresholding_method_combobox.currentText() == "manual")
             else:
                 self.config.config_dict["ocr_settings"]["enable_thresholding"] = False
                 self.thresholding_slider.setEnabled(False)
@@ -408,6 +693,20 @@ class MainWindow(QWidget):
 
         thresholding_layout.addWidget(self.enable_thresholding_checkbox)
 
+        def change_thresholding_method(method):
+            self.config.config_dict["ocr_settings"]["thresholding_method"] = method
+            self.thresholding_slider.setEnabled(
+                self.config.config_dict["ocr_settings"]["enable_thresholding"] and method == "manual"
+            )
+            master_object.ocr.start_ocr_in_thread(master_object.unprocessed_image)
+
+        self.thresholding_method_combobox = QComboBox()
+        self.thresholding_method_combobox.addItems(ImageProcessor.THRESHOLDING_METHODS)
+        self.thresholding_method_combobox.setCurrentText(config.config_dict["ocr_settings"]["thresholding_method"])
+        self.thresholding_method_combobox.currentTextChanged.connect(change_thresholding_method)  # type: ignore
+
+        thresholding_layout.addWidget(self.thresholding_method_combobox)
+
         def change_thresholding_value():
             self.config.config_dict["ocr_settings"]["thresholding_value"] = self.thresholding_slider.value()
             print(f"thresholding: {self.thresholding_slider.value()}")
@@ -419,7 +718,10 @@ class MainWindow(QWidget):
         self.thresholding_slider.setPageStep(1)
         self.thresholding_slider.setValue(config.config_dict["ocr_settings"]["thresholding_value"])
         self.thresholding_slider.sliderReleased.connect(change_thresholding_value)  # type: ignore
-        self.thresholding_slider.setEnabled(config.config_dict["ocr_settings"]["enable_thresholding"])
+        self.thresholding_slider.setEnabled(
+            config.config_dict["ocr_settings"]["enable_thresholding"]
+            and config.config_dict["ocr_settings"]["thresholding_method"] == "manual"
+        )
 
         processed_image = master_object.processed_image
         self.image_preview = ImagePreview(processed_image)
@@ -458,10 +760,8 @@ class MainWindow(QWidget):
         srs_screenshot_layout2.addWidget(manual_srs_screenshot_button)
 
         def copy_screenshot_to_clipboard():
-            if self.srs_screenshot.image:
-                im = ImageQt(self.srs_screenshot.image).copy()
-                print(type(im))
-                QApplication.clipboard().setImage(im)
+            if self.srs_screenshot.image_data:
+                QApplication.clipboard().setImage(QImage.fromData(self.srs_screenshot.image_data))
 
         srs_screenshot_to_clipboard_button = QPushButton("Copy Screenshot to Clipboard")
         srs_screenshot_to_clipboard_button.clicked.connect(copy_screenshot_to_clipboard)  # type: ignore
@@ -577,8 +877,7 @@ class MainWindow(QWidget):
 
     def toggle_auto_ocr(self):
         if self.master_object.auto_ocr_thread:
-            self.master_object.auto_ocr_thread.stop_signal = True
-            self.master_object.auto_ocr_thread.wait()
+            self.master_object.stop_auto_ocr()
         else:
             self.master_object.start_auto_ocr_in_thread()
 
@@ -656,28 +955,129 @@ class MainWindow(QWidget):
             self.stop_signal = True
 
 
+class PreviewRenderer(QObject):
+    """Converts images to QImages on a worker thread, shrunk to the size they are shown at"""
+
+    CACHE_SIZE = 6
+    # image, requested size, preview
+    rendered_signal = cast(SignalInstance, Signal(object, object, object))
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="preview-renderer")
+        self.lock = threading.Lock()
+        # keyed by id(image), every entry holds on to its image so that the id can't be reused
+        self.cache: OrderedDict[tuple, tuple[Image.Image, QImage]] = OrderedDict()
+        self.queued: set[tuple] = set()
+
+    def request(self, image: Image.Image, size: Optional[tuple[int, int]] = None) -> Optional[QImage]:
+        """Returns the cached preview, otherwise renders it in the background and emits rendered_signal"""
+        key = (id(image), size)
+        with self.lock:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                return self.cache[key][1]
+            if key in self.queued:
+                return None
+            self.queued.add(key)
+        self.executor.submit(self.render, image, size)
+        return None
+
+    def render(self, image: Image.Image, size: Optional[tuple[int, int]]):
+        key = (id(image), size)
+        try:
+            with metrics.measure("preview_render"):
+                preview_image = image
+                if size:
+                    scale = min(size[0] / image.width, size[1] / image.height, 1)
+                    if scale < 1:
+                        preview_size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+                        preview_image = image.resize(preview_size, Image.BILINEAR, reducing_gap=2.0)
+                preview = ImageQt(preview_image).copy()
+            with self.lock:
+                self.cache[key] = (image, preview)
+                while len(self.cache) > self.CACHE_SIZE:
+                    self.cache.popitem(last=False)
+        finally:
+            with self.lock:
+                self.queued.discard(key)
+        self.rendered_signal.emit(image, size, preview)
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+
+
+preview_renderer = PreviewRenderer()
+
+
 class ImagePreview(QLabel):
+    RERENDER_DELAY_MS = 150
+
     def __init__(self, image=None):
         super().__init__()
         self.image = image
+        self.requested_size: Optional[tuple[int, int]] = None
+        # the last rendered preview, rescaled while resizing until a preview of the new size is rendered
+        self.preview_pixmap: Optional[QPixmap] = None
         self.setMinimumSize(350, 170)
+        self.rerender_timer = QTimer(self)
+        self.rerender_timer.setSingleShot(True)
+        self.rerender_timer.timeout.connect(self._update_pixmap)  # type: ignore
+        preview_renderer.rendered_signal.connect(self.show_rendered_preview)
 
         self._update_pixmap()
 
     def _update_pixmap(self):
         if self.image:
-            im = ImageQt(self.image).copy()
-            pixmap = QPixmap.fromImage(im).scaled(self.width(), self.height(), Qt.KeepAspectRatio)
-            self.setPixmap(pixmap)
+            device_pixel_ratio = self.devicePixelRatioF()
+            self.requested_size = (
+                round(self.width() * device_pixel_ratio),
+                round(self.height() * device_pixel_ratio),
+            )
+            if preview := preview_renderer.request(self.image, self.requested_size):
+                self.show_preview(preview)
         else:
             self.setText("This will show a preview of your screenshots.")
 
+    def show_rendered_preview(self, image, size, preview: QImage):
+        if image is self.image and size == self.requested_size:
+            self.show_preview(preview)
+
+    def show_preview(self, preview: QImage):
+        self.preview_pixmap = QPixmap.fromImage(preview)
+        self.preview_pixmap.setDevicePixelRatio(self.devicePixelRatioF())
+        self.setPixmap(self.preview_pixmap)
+
     def setImage(self, image):
         self.image = image
+        self.preview_pixmap = None
         self._update_pixmap()
 
     def resizeEvent(self, _):
-        self._update_pixmap()
+        if self.image and self.preview_pixmap:
+            device_pixel_ratio = self.devicePixelRatioF()
+            pixmap = self.preview_pixmap.scaled(self.size() * device_pixel_ratio, Qt.KeepAspectRatio)  # type: ignore
+            pixmap.setDevicePixelRatio(device_pixel_ratio)
+            self.setPixmap(pixmap)
+            self.rerender_timer.start(self.RERENDER_DELAY_MS)
+        else:
+            self._update_pixmap()
+
+
+# pillow format and file extension per srs image format
+SRS_IMAGE_FORMATS = {"webp": ("WEBP", ".webp"), "jpeg": ("JPEG", ".jpg"), "png": ("PNG", ".png")}
+
+
+def encode_srs_image(image: Image.Image, settings: dict[str, Any]) -> bytes:
+    pillow_format = SRS_IMAGE_FORMATS[settings["format"]][0]
+    buffer = io.BytesIO()
+    if pillow_format == "WEBP":
+        image.save(buffer, pillow_format, quality=settings["quality"], method=settings["effort"])
+    elif pillow_format == "JPEG":
+        image.save(buffer, pillow_format, quality=settings["quality"], optimize=True)
+    else:
+        image.save(buffer, pillow_format, compress_level=settings["effort"])
+    return buffer.getvalue()
 
 
 class SRSScreenshot:
@@ -685,7 +1085,21 @@ class SRSScreenshot:
         self.app = app
         self.config = config
         self.srs_image_location = Rectangle()
-        self.image: Optional[Image.Image] = None
+        # the newest encoded srs image
+        self.image_data: Optional[bytes] = None
+        self.encoder = ThreadPoolExecutor(max_workers=2, thread_name_prefix="srs-encoder")
+        self.lock = threading.Lock()
+        # encodes can finish out of order, only the newest capture is kept
+        self.capture_count = 0
+        self.encoded_capture_count = 0
+        # (perf_counter timestamp, downscaled image) of the recent frames of the srs region
+        self.frames: deque[tuple[float, Image.Image]] = deque(
+            maxlen=config.config_dict["srs_image"]["frame_buffer_size"]
+        )
+        # bumped whenever the srs region moves, frames grabbed from the old region are dropped
+        self.location_generation = 0
+        self.frame_buffer_thread: Optional[SRSScreenshot.FrameBufferThread] = None
+        self.srs_screenshot_thread: Optional[SRSScreenshot.SRSScreenshotThread] = None
 
     def set_srs_image_location(self):
         QApplication.setOverrideCursor(Qt.CrossCursor)
@@ -697,12 +1111,12 @@ class SRSScreenshot:
             self.srs_image_location.y1 = selection_window.coordinates.y1
             self.srs_image_location.x2 = selection_window.coordinates.x2
             self.srs_image_location.y2 = selection_window.coordinates.y2
+            with self.lock:
+                self.location_generation += 1
+                self.frames.clear()
         QApplication.restoreOverrideCursor()
 
-    def take_srs_screenshot(self):
-        if not self.config.config_dict["enable_srs_image"]:
-            # exit function if srs_image is disabled
-            return
+    def get_srs_image_bbox(self) -> tuple[int, int, int, int]:
         if (
             not self.srs_image_location.x1
             and not self.srs_image_location.y1
@@ -713,21 +1127,115 @@ class SRSScreenshot:
             size = screen.size()
             self.srs_image_location.x2 = size.width()
             self.srs_image_location.y2 = size.height()
+        return (
+            int(self.srs_image_location.x1),
+            int(self.srs_image_location.y1),
+            int(self.srs_image_location.x2),
+            int(self.srs_image_location.y2),
+        )
 
-        if image := ImageGrab.grab(
-            bbox=(
-                int(self.srs_image_location.x1),
-                int(self.srs_image_location.y1),
-                int(self.srs_image_location.x2),
-                int(self.srs_image_location.y2),
-            ),
-        ):
-            MAX_SIZE = (848, 480)
-            image.thumbnail(MAX_SIZE)
-            with NamedTemporaryFile(suffix=".webp", delete=False) as temp_webp_file:
-                image.save(temp_webp_file.name, optimize=True, quality=75)
-                self.image = Image.open(temp_webp_file.name)
-                shutil.copyfile(temp_webp_file.name, "test.webp")
+    def take_srs_screenshot(self):
+        if not self.config.config_dict["enable_srs_image"]:
+            # exit function if srs_image is disabled
+            return
+        if image := screen_capture.grab(self.get_srs_image_bbox()):
+            self.encode_image_in_background(image)
+
+    def take_srs_screenshot_at(self, timestamp: float):
+        """Uses the buffered frame closest to timestamp, only grabs the screen when no frames are buffered"""
+        if not self.config.config_dict["enable_srs_image"]:
+            return
+        with self.lock:
+            frames = list(self.frames)
+        if not frames:
+            self.take_srs_screenshot_in_thread()
+            return
+        frame_timestamp, frame = min(frames, key=lambda timestamped_frame: abs(timestamped_frame[0] - timestamp))
+        metrics.observe("srs_frame_offset", abs(frame_timestamp - timestamp))
+        # the buffered frame stays untouched, encoding shrinks its image in place
+        self.encode_image_in_background(frame.copy())
+
+    def encode_image_in_background(self, image: Image.Image):
+        with self.lock:
+            self.capture_count += 1
+            capture_number = self.capture_count
+        self.encoder.submit(self.encode_image, image, capture_number)
+
+    def encode_image(self, image: Image.Image, capture_number: int):
+        # runs in the encoder pool, whose futures nobody waits on, so errors have to be logged here
+        try:
+            settings = self.config.config_dict["srs_image"]
+            start = time.perf_counter()
+            image.thumbnail((settings["max_width"], settings["max_height"]))
+            image_data = encode_srs_image(image, settings)
+            duration = time.perf_counter() - start
+            metrics.observe("srs_encode", duration)
+            metrics.increment("srs_encoded_bytes", len(image_data))
+            logger.debug(f"encoded {image.width}x{image.height} srs image, {len(image_data)} bytes in {duration:.3f}s")
+            with self.lock:
+                # an older capture finishing late must not replace a newer one, but it's still exported
+                if capture_number > self.encoded_capture_count:
+                    self.encoded_capture_count = capture_number
+                    self.image_data = image_data
+            if export_directory := settings["export_directory"]:
+                self.export_image(image_data, export_directory, capture_number)
+        except Exception:
+            logger.exception(f"couldn't encode or export srs capture {capture_number}")
+
+    def export_image(self, image_data: bytes, export_directory: str, capture_number: int):
+        export_directory = os.path.expanduser(export_directory)
+        pathlib.Path(export_directory).mkdir(parents=True, exist_ok=True)
+        extension = SRS_IMAGE_FORMATS[self.config.config_dict["srs_image"]["format"]][1]
+        file_name = f"srs-{time.strftime('%Y%m%d-%H%M%S')}-{capture_number}{extension}"
+        with open(os.path.join(export_directory, file_name), "wb") as f:
+            f.write(image_data)
+
+    def buffer_frame(self):
+        if not self.config.config_dict["enable_srs_image"]:
+            return
+        settings = self.config.config_dict["srs_image"]
+        with self.lock:
+            location_generation = self.location_generation
+        timestamp = time.perf_counter()
+        image = screen_capture.grab(self.get_srs_image_bbox())
+        image.thumbnail((settings["max_width"], settings["max_height"]))
+        with self.lock:
+            if location_generation == self.location_generation:
+                self.frames.append((timestamp, image))
+
+    def start_frame_buffer(self):
+        self.frame_buffer_thread = SRSScreenshot.FrameBufferThread(self)
+        self.frame_buffer_thread.start()
+
+    def stop_frame_buffer(self):
+        if self.frame_buffer_thread:
+            self.frame_buffer_thread.stop()
+            self.frame_buffer_thread.wait()
+            self.frame_buffer_thread = None
+        with self.lock:
+            self.frames.clear()
+
+    class FrameBufferThread(QThread):
+        def __init__(self, srs_screenshot: SRSScreenshot):
+            QThread.__init__(self)
+            self.srs_screenshot = srs_screenshot
+            self.stop_event = threading.Event()
+
+        def run(self):
+            interval = self.srs_screenshot.config.config_dict["srs_image"]["frame_buffer_interval"]
+            while not self.stop_event.is_set():
+                with metrics.measure("srs_frame_buffer_grab"):
+                    self.srs_screenshot.buffer_frame()
+                self.stop_event.wait(interval)
+
+        def stop(self):
+            self.stop_event.set()
+
+    def close(self):
+        self.stop_frame_buffer()
+        if self.srs_screenshot_thread:
+            self.srs_screenshot_thread.wait()
+        self.encoder.shutdown()
 
     def trigger_srs_screenshot_on_clipboard_change(self):
         while True:
@@ -778,26 +1286,27 @@ class OCRSettingsWindow(QWidget):
 
         unprocessed_image = master_object.unprocessed_image
         processed_image = master_object.processed_image
+        # the images whose previews are being rendered for the labels
+        self.unprocessed_image = None
+        self.processed_image = None
+        preview_renderer.rendered_signal.connect(self.show_rendered_preview)
 
         layout = QHBoxLayout()
         left_side_layout = QVBoxLayout()
         right_side_layout = QVBoxLayout()
 
         if unprocessed_image:
-            im = ImageQt(unprocessed_image).copy()
-            pixmap = QPixmap.fromImage(im)
-            self.unprocessed_image_label.setPixmap(pixmap)
+            self.refresh_unprocessed_image(unprocessed_image)
         else:
             self.unprocessed_image_label.setText("No screenshot taken yet...")
 
         if processed_image:
-            im = ImageQt(processed_image).copy()
-            pixmap = QPixmap.fromImage(im)
-            self.processed_image_label.setPixmap(pixmap)
+            self.refresh_processed_image(processed_image)
         else:
             self.processed_image_label.setText("...therefore there's nothing to process.")
 
         self.ocr_text_label = QLabel("This will show the resulting OCR text.")
+        self.ocr_cache_stats_label = QLabel()
 
         unprocessed_image_layout = QHBoxLayout()
         unprocessed_image_scrollarea = QScrollArea()
@@ -814,6 +1323,7 @@ class OCRSettingsWindow(QWidget):
         left_side_layout.addWidget(unprocessed_image_scrollarea)
         left_side_layout.addWidget(processed_image_scrollarea)
         left_side_layout.addWidget(self.ocr_text_label)
+        left_side_layout.addWidget(self.ocr_cache_stats_label)
         left_side_layout.addStretch()
 
         left_side_widget = QWidget()
@@ -829,25 +1339,83 @@ class OCRSettingsWindow(QWidget):
         upscale_spinbox.setMinimum(1)
         upscale_spinbox.setMaximum(6)
         upscale_spinbox.valueChanged.connect(change_upscale_value)  # type: ignore
+        upscale_spinbox.setEnabled(not self.config.config_dict["ocr_settings"]["auto_upscale"])
         right_side_layout.addWidget(upscale_spinbox)
 
+        def toggle_auto_upscale(state):
+            self.config.config_dict["ocr_settings"]["auto_upscale"] = state == Qt.Checked
+            upscale_spinbox.setEnabled(state != Qt.Checked)
+            master_object.ocr.start_ocr_in_thread(unprocessed_image)
+
+        auto_upscale_checkbox = QCheckBox("Auto Upscale 🛈")
+        auto_upscale_checkbox.setChecked(self.config.config_dict["ocr_settings"]["auto_upscale"])
+        auto_upscale_checkbox.setToolTip("Upscale based on the estimated text height instead of a fixed amount")
+        auto_upscale_checkbox.stateChanged.connect(toggle_auto_upscale)  # type: ignore
+        right_side_layout.addWidget(auto_upscale_checkbox)
+
         right_side_widget = QWidget()
         right_side_widget.setLayout(right_side_layout)
         layout.addWidget(right_side_widget)
         self.setLayout(layout)
 
     def refresh_unprocessed_image(self, image):
-        im = ImageQt(image).copy()
-        pixmap = QPixmap.fromImage(im)
-        self.unprocessed_image_label.setPixmap(pixmap)
+        """The labels show the images at full size in scroll areas, so only the conversion moves off the gui thread"""
+        self.unprocessed_image = image
+        if preview := preview_renderer.request(image):
+            self.unprocessed_image_label.setPixmap(QPixmap.fromImage(preview))
 
     def refresh_processed_image(self, image):
-        im = ImageQt(image).copy()
-        pixmap = QPixmap.fromImage(im)
-        self.processed_image_label.setPixmap(pixmap)
+        self.processed_image = image
+        if preview := preview_renderer.request(image):
+            self.processed_image_label.setPixmap(QPixmap.fromImage(preview))
+
+    def show_rendered_preview(self, image, size, preview: QImage):
+        if size is not None:
+            return
+        if image is self.unprocessed_image:
+            self.unprocessed_image_label.setPixmap(QPixmap.fromImage(preview))
+        if image is self.processed_image:
+            self.processed_image_label.setPixmap(QPixmap.fromImage(preview))
 
     def refresh_ocr_text(self, text):
         self.ocr_text_label.setText(text)
+        cache_stats = self.master_object.ocr.engine.cache.get_stats()
+        self.ocr_cache_stats_label.setText(
+            f"OCR cache: {cache_stats['hits'] + cache_stats['disk_hits']} hits, {cache_stats['misses']} misses, "
+            f"{cache_stats['saved_seconds']:.1f}s saved"
+        )
+
+
+class StatsWindow(QWidget):
+    def __init__(self, master_object: MasterObject):
+        super().__init__()
+        self.master_object = master_object
+        self.setWindowTitle("Migaku OCR Statistics")
+        self.setWindowFlags(Qt.Dialog)  # type: ignore
+
+        self.stats_label = QLabel()
+        self.stats_label.setStyleSheet("font-family: monospace;")
+        self.stats_label.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        layout = QVBoxLayout()
+        layout.addWidget(self.stats_label)
+        self.setLayout(layout)
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh_stats)  # type: ignore
+        self.refresh_timer.start(1000)
+        self.refresh_stats()
+
+    def refresh_stats(self):
+        lines = [f"{'stage':<22}{'count':>7}{'p50':>10}{'p95':>10}{'max':>10}"]
+        for stage, summary in metrics.get_stage_summaries().items():
+            lines.append(
+                f"{stage:<22}{summary['count']:>7}{summary['p50'] * 1000:>8.1f}ms"
+                f"{summary['p95'] * 1000:>8.1f}ms{summary['max'] * 1000:>8.1f}ms"
+            )
+        lines.append("")
+        for counter, value in sorted(metrics.get_counters().items()):
+            lines.append(f"{counter:<32}{value:>7}")
+        self.stats_label.setText("\n".join(lines))
 
 
 class HotKeySettingsWindow(QWidget):
@@ -1143,12 +1711,293 @@ class PersistentWindow(QWidget):
 typer_app = typer.Typer()
 
 
+@typer_app.callback(invoke_without_command=True)
+def main(ctx: typer.Context):
+    # start the gui when no subcommand is given
+    if ctx.invoked_subcommand is None:
+        execute_order66()
+
+
 @typer_app.command()
 def execute_order66():
     global master_object
     master_object = MasterObject()
 
 
+def character_error_rate(ground_truth: str, text: str) -> float:
+    # full and half width forms of the same character shouldn't count as errors
+    ground_truth = "".join(unicodedata.normalize("NFKC", ground_truth).split())
+    text = "".join(unicodedata.normalize("NFKC", text).split())
+    if not ground_truth:
+        return float(bool(text))
+    # levenshtein distance, keeping only the previous row
+    previous_row = list(range(len(text) + 1))
+    for i, ground_truth_char in enumerate(ground_truth, start=1):
+        current_row = [i]
+        for j, text_char in enumerate(text, start=1):
+            current_row.append(
+                min(previous_row[j] + 1, current_row[j - 1] + 1, previous_row[j - 1] + (ground_truth_char != text_char))
+            )
+        previous_row = current_row
+    return previous_row[-1] / len(ground_truth)
+
+
+def summarize_durations(durations: list[float]) -> dict[str, float]:
+    p50, p95 = (float(value) for value in numpy.percentile(durations, [50, 95]))
+    return {"p50_ms": round(p50 * 1000, 2), "p95_ms": round(p95 * 1000, 2), "max_ms": round(max(durations) * 1000, 2)}
+
+
+class OCREngineName(str, Enum):
+    TESSEROCR = "tesserocr"
+    SUBPROCESS = "subprocess"
+
+
+@typer_app.command()
+def benchmark(
+    image_directory: str = typer.Option("testImages", help="Images with optional <name>.gt.txt transcriptions"),
+    repeat: int = typer.Option(3, help="How often every image is processed"),
+    engine: Optional[OCREngineName] = typer.Option(None, help="Only benchmark this engine"),
+    output: Optional[pathlib.Path] = typer.Option(None, help="Write the results as JSON, to diff them between commits"),
+    trace_allocations: bool = typer.Option(
+        False, help="Also record the peak memory allocated by every preprocessing stage, this slows down all stages"
+    ),
+):
+    """Measure character error rate and per-stage latency over the test images using the default settings"""
+    config = Configuration(load_user_config=False)
+    # every repetition has to do the full work
+    config.config_dict["ocr_cache"]["max_entries"] = 0
+    image_paths = sorted(
+        path for path in pathlib.Path(image_directory).iterdir() if path.suffix.lower() in BATCH_IMAGE_EXTENSIONS
+    )
+    if engine == OCREngineName.TESSEROCR and not PyTessBaseAPI:
+        # the engine would silently fall back to the binary
+        raise typer.BadParameter("tesserocr is not installed", param_hint="--engine")
+    if engine:
+        engine_names = [engine.value]
+    else:
+        engine_names = ["subprocess", "tesserocr"] if PyTessBaseAPI else ["subprocess"]
+
+    if trace_allocations:
+        tracemalloc.start()
+    results: dict[str, Any] = {}
+    for engine_name in engine_names:
+        config.config_dict["ocr_settings"]["ocr_engine"] = engine_name
+        ocr_engine = TesseractEngine(config)
+        # loading the models shouldn't be part of the measurements
+        for language, psm in [("jpn", 6), ("jpn_vert", 5)]:
+            ocr_engine.image_to_string(Image.new("L", (32, 32), 255), language, psm)
+
+        stage_durations: dict[str, list[float]] = {}
+        stage_allocations: dict[str, list[int]] = {}
+        image_results: dict[str, Any] = {}
+        for path in image_paths:
+            with Image.open(path) as image:
+                image = image.convert("RGB")
+            for _ in range(repeat):
+                image_processor = ImageProcessor(config, image)
+                processed_image = image_processor.process_image()
+                start = time.perf_counter()
+                text = ocr_engine.recognize(processed_image)
+                timings = dict(image_processor.timings, ocr=time.perf_counter() - start)
+                timings["total"] = sum(timings.values())
+                for stage, duration in timings.items():
+                    stage_durations.setdefault(stage, []).append(duration)
+                for stage, allocated in image_processor.allocations.items():
+                    stage_allocations.setdefault(stage, []).append(allocated)
+            image_results[path.name] = {"text": text}
+            ground_truth_path = path.with_suffix(".gt.txt")
+            if ground_truth_path.exists():
+                ground_truth = ground_truth_path.read_text(encoding="utf-8")
+                image_results[path.name]["cer"] = round(character_error_rate(ground_truth, text), 4)
+        ocr_engine.close()
+
+        error_rates = [result["cer"] for result in image_results.values() if "cer" in result]
+        results[engine_name] = {
+            "mean_cer": round(statistics.mean(error_rates), 4) if error_rates else None,
+            "stages": {stage: summarize_durations(durations) for stage, durations in stage_durations.items()},
+            "images": image_results,
+        }
+        if trace_allocations:
+            results[engine_name]["allocations"] = {
+                stage: {"mean_kib": round(statistics.mean(sizes) / 1024, 1), "max_kib": round(max(sizes) / 1024, 1)}
+                for stage, sizes in stage_allocations.items()
+            }
+
+        print(f"{engine_name}: mean CER {results[engine_name]['mean_cer']} over {len(error_rates)} images")
+        for stage, summary in results[engine_name]["stages"].items():
+            print(
+                f"  {stage:<20} p50 {summary['p50_ms']:>8}ms p95 {summary['p95_ms']:>8}ms max {summary['max_ms']:>8}ms"
+            )
+        for stage, summary in results[engine_name].get("allocations", {}).items():
+            print(f"  {stage:<20} allocated mean {summary['mean_kib']:>9}KiB max {summary['max_kib']:>9}KiB")
+
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True, ensure_ascii=False)
+
+
+@typer_app.command()
+def benchmark_capture(
+    repeat: int = typer.Option(200, help="How many grabs every backend does"),
+    width: int = typer.Option(800, help="Width of the grabbed region"),
+    height: int = typer.Option(200, help="Height of the grabbed region"),
+):
+    """Compare the grab latency of ImageGrab and the persistent screen capture, use xvfb-run on headless machines"""
+    bbox = (0, 0, width, height)
+    backends = {
+        "ImageGrab.grab": lambda: ImageGrab.grab(bbox=bbox),
+        "screen_capture.grab": lambda: screen_capture.grab(bbox),
+        "screen_capture.grab_array": lambda: screen_capture.grab_array(bbox),
+    }
+    for name, grab in backends.items():
+        # opening the connection isn't part of the measurements
+        grab()
+        durations = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            grab()
+            durations.append(time.perf_counter() - start)
+        summary = summarize_durations(durations)
+        print(f"{name:<26} p50 {summary['p50_ms']:>8}ms p95 {summary['p95_ms']:>8}ms max {summary['max_ms']:>8}ms")
+    screen_capture.close()
+
+
+@typer_app.command()
+def benchmark_pixmap(
+    image_path: str = typer.Option("testImages/screenshot(566).png", help="Image that is scaled to every size"),
+    repeat: int = typer.Option(20, help="How often every conversion runs per size"),
+):
+    """Compare converting selections to Pillow images directly and through a PNG round trip"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    app = QApplication.instance() or QApplication(sys.argv)
+    print(f"Qt platform: {app.platformName()}")  # type: ignore
+
+    def convert_through_png(pixmap: QPixmap) -> Image.Image:
+        buffer = QBuffer()
+        buffer.open(QBuffer.ReadWrite)  # type: ignore
+        pixmap.toImage().save(buffer, "PNG")  # type: ignore
+        image = Image.open(io.BytesIO(buffer.data()))  # type: ignore
+        # Image.open is lazy, the decoding is part of the conversion
+        image.load()
+        return image
+
+    source_image = QImage(image_path)
+    for width, height in [(800, 200), (1920, 1080), (3840, 2160)]:
+        pixmap = QPixmap.fromImage(source_image.scaled(width, height))
+        for name, convert in [("png", convert_through_png), ("direct", convert_qpixmap_to_pil_image)]:
+            durations = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                convert(pixmap)
+                durations.append(time.perf_counter() - start)
+            summary = summarize_durations(durations)
+            print(
+                f"{width}x{height} {name:<8} p50 {summary['p50_ms']:>8}ms p95 {summary['p95_ms']:>8}ms "
+                f"max {summary['max_ms']:>8}ms"
+            )
+
+
+BATCH_IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".webp")
+# every batch worker process has its own engine, see init_batch_worker
+batch_engine: Optional[TesseractEngine] = None
+
+
+def iterate_batch_image_paths(inputs: list[str]):
+    for entry in inputs:
+        if os.path.isdir(entry):
+            yield from sorted(
+                str(path) for path in pathlib.Path(entry).rglob("*") if path.suffix.lower() in BATCH_IMAGE_EXTENSIONS
+            )
+        elif glob.has_magic(entry):
+            yield from sorted(glob.iglob(entry, recursive=True))
+        else:
+            yield entry
+
+
+def init_batch_worker():
+    global batch_engine
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    # the pool already uses every core, tesseract shouldn't start additional threads on top of that
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+    batch_engine = TesseractEngine(Configuration())
+
+
+def ocr_batch_image(path: str) -> dict[str, Any]:
+    engine = cast(TesseractEngine, batch_engine)
+    start = time.perf_counter()
+    try:
+        with Image.open(path) as image:
+            image = image.convert("RGB")
+        timings = {"load": time.perf_counter() - start}
+        image_processor = ImageProcessor(engine.config, image)
+        processed_image = image_processor.process_image()
+        timings.update(image_processor.timings)
+        ocr_start = time.perf_counter()
+        text = engine.recognize(processed_image)
+        timings["ocr"] = time.perf_counter() - ocr_start
+    except Exception as e:
+        # one unreadable or broken image must not end the whole batch
+        return {"path": path, "error": f"{type(e).__name__}: {e}"}
+    timings["total"] = time.perf_counter() - start
+    return {"path": path, "text": text, "timings_ms": {name: round(t * 1000, 2) for name, t in timings.items()}}
+
+
+@typer_app.command()
+def batch(
+    inputs: List[str] = typer.Argument(..., help="Image files, directories or glob patterns"),
+    output: Optional[pathlib.Path] = typer.Option(
+        None, help="JSONL file that results are appended to, images that are already in it are skipped"
+    ),
+    workers: int = typer.Option(os.cpu_count() or 1, help="Number of OCR processes"),
+):
+    """OCR images without starting the GUI, writing one JSON line per image as soon as it is done"""
+    done_paths = set()
+    interrupted_mid_line = False
+    if output and output.exists() and output.stat().st_size:
+        with open(output, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                with contextlib.suppress(ValueError, KeyError, TypeError):
+                    result = json.loads(line)
+                    # images that failed are tried again
+                    if "text" in result:
+                        done_paths.add(result["path"])
+        with open(output, "rb") as binary_file:
+            binary_file.seek(-1, os.SEEK_END)
+            interrupted_mid_line = binary_file.read(1) != b"\n"
+        logger.info(f"resuming, skipping {len(done_paths)} already processed images")
+
+    output_file = open(output, "a", encoding="utf-8") if output else sys.stdout
+    if interrupted_mid_line:
+        output_file.write("\n")
+
+    processed_count = 0
+
+    def write_results(futures):
+        nonlocal processed_count
+        for future in futures:
+            output_file.write(json.dumps(future.result(), ensure_ascii=False) + "\n")
+            output_file.flush()
+            processed_count += 1
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_batch_worker) as executor:
+            pending: set = set()
+            for path in iterate_batch_image_paths(inputs):
+                if path in done_paths:
+                    continue
+                # only keep a few images per worker in flight, so memory use doesn't grow with the input size
+                if len(pending) >= workers * 2:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    write_results(finished)
+                pending.add(executor.submit(ocr_batch_image, path))
+            write_results(as_completed(pending))
+    finally:
+        if output:
+            output_file.close()
+    logger.info(f"processed {processed_count} images")
+
+
 class MasterObject:
     def __init__(self) -> None:
         self.app = QApplication(sys.argv)
@@ -1158,12 +2007,17 @@ class MasterObject:
         self.audio_worker = AudioWorker(self.app, self.config)
         self.main_hotkey_qobject = MainHotkeyQObject(self.config, self, self.audio_worker)
         self.ocr = OCR(self)
+        self.app.aboutToQuit.connect(self.shut_down)  # type: ignore
+        if self.config.config_dict["srs_image"]["enable_frame_buffer"]:
+            self.srs_screenshot.start_frame_buffer()
         self.persistent_window: Optional[PersistentWindow] = None
         self.unprocessed_image: Optional[Image.Image] = None
         self.processed_image: Optional[Image.Image] = None
         self.update_audio_progress_thread: Optional[MainWindow.UpdateAudioProgressThread] = None
         self.auto_ocr_thread: Optional[MasterObject.AutoOcrThread] = None
         self.closed_persistent_window = Rectangle()
+        self.metrics_server: Optional[MetricsServer] = None
+        self.toggle_metrics_endpoint(self.config.config_dict["metrics"]["enable_endpoint"])
         # this allows for ctrl-c to close the application
         signal.signal(signal.SIGINT, lambda *_: self.app.quit())
 
@@ -1183,14 +2037,38 @@ class MasterObject:
 
         self.openMain = QAction("Open")
         self.openMain.triggered.connect(self.show_main_window)  # type: ignore
+        self.openStats = QAction("Statistics")
+        self.openStats.triggered.connect(self.show_stats_window)  # type: ignore
+        self.metricsEndpoint = QAction("Metrics Endpoint")
+        self.metricsEndpoint.setCheckable(True)
+        self.metricsEndpoint.setChecked(self.config.config_dict["metrics"]["enable_endpoint"])
+        self.metricsEndpoint.toggled.connect(self.toggle_metrics_endpoint)  # type: ignore
         self.quit = QAction("Quit")
         self.quit.triggered.connect(self.app.quit)  # type: ignore
 
         self.menu.addAction(self.openMain)
+        self.menu.addAction(self.openStats)
+        self.menu.addAction(self.metricsEndpoint)
         self.menu.addAction(self.quit)
 
         self.tray.setContextMenu(self.menu)
 
+    def show_stats_window(self):
+        self.stats_window = StatsWindow(self)
+        self.stats_window.show()
+
+    def toggle_metrics_endpoint(self, enabled: bool):
+        self.config.config_dict["metrics"]["enable_endpoint"] = enabled
+        if self.metrics_server:
+            self.metrics_server.stop()
+            self.metrics_server = None
+        if enabled:
+            try:
+                self.metrics_server = MetricsServer(self.config.config_dict["metrics"]["port"])
+                self.metrics_server.start()
+            except OSError as e:
+                logger.warning(f"could not start metrics endpoint: {e}")
+
     def show_main_window(self):
         self.main_window = MainWindow(
             self.config, self, self.srs_screenshot, self.audio_worker, self.main_hotkey_qobject
@@ -1198,7 +2076,7 @@ class MasterObject:
         self.main_window.show()
 
     def take_single_screenshot(self):
-        self.srs_screenshot.take_srs_screenshot_in_thread()
+        self.srs_screenshot.take_srs_screenshot_at(time.perf_counter())
         QApplication.setOverrideCursor(Qt.CrossCursor)
         selector = SelectorWidget(self.app)
         selector.show()
@@ -1247,12 +2125,18 @@ class MasterObject:
         return (int(x1), int(y1), int(x2), int(y2))
 
     def take_screenshot_from_persistent_window(self):
-        self.srs_screenshot.take_srs_screenshot_in_thread()
+        self.srs_screenshot.take_srs_screenshot_at(time.perf_counter())
         persistent_window = self.persistent_window
         x1, y1, x2, y2 = self.get_persistent_window_coordinates()
         if Rectangle(x1, y1, x2, y2):
             x1, y1, x2, y2 = self.get_persistent_window_coordinates()
-            image = ImageGrab.grab(bbox=(x1, y1, x2, y2))
+            with metrics.measure("grab"):
+                image = screen_capture.grab((x1, y1, x2, y2))
+            # taken before the ocr button is painted over, so it matches the frames auto ocr compares it to
+            text_fingerprint = None
+            if self.auto_ocr_thread:
+                gray = cv2.cvtColor(numpy.asarray(image), cv2.COLOR_RGB2GRAY)  # type: ignore
+                text_fingerprint = TextFingerprint(gray)
             if image and persistent_window and persistent_window.ocrButton.isVisible():
                 button = persistent_window.ocrButton
                 x1 = button.x()
@@ -1263,10 +2147,26 @@ class MasterObject:
                 for x, y in itertools.product(range(width), range(height)):
                     image.putpixel((x1 + x, y1 + y), color)
 
-            self.ocr.start_ocr_in_thread(image)
+            self.ocr.start_ocr_in_thread(
+                image, region=self.get_persistent_window_coordinates(), text_fingerprint=text_fingerprint
+            )
         else:
             logger.warning("persistent window not initialized yet or persistent_window location not saved")
 
+    def stop_auto_ocr(self):
+        if self.auto_ocr_thread:
+            self.auto_ocr_thread.stop()
+            self.auto_ocr_thread.wait()
+            self.auto_ocr_thread = None
+
+    def shut_down(self):
+        # the threads that grab the screen are stopped first, so none of them grabs after the capture is closed
+        self.stop_auto_ocr()
+        self.srs_screenshot.close()
+        preview_renderer.close()
+        self.ocr.engine.close()
+        screen_capture.close()
+
     def start_auto_ocr_in_thread(self):
         self.auto_ocr_thread = MasterObject.AutoOcrThread(self)
         self.auto_ocr_thread.persistent_auto_signal.connect(self.take_screenshot_from_persistent_window)
@@ -1277,32 +2177,69 @@ class MasterObject:
 
         def __init__(self, master_object: MasterObject):
             QThread.__init__(self)
-            self.stop_signal = False
+            self.stop_event = threading.Event()
             self.master_object = master_object
 
         def run(self):
-            hash1 = None
-            changing = False
-            while not self.stop_signal:
+            auto_ocr_settings = self.master_object.config.config_dict["auto_ocr"]
+            previous_hashes = None
+            # when the region last changed, the ocr waits until it has been still for settle_seconds
+            changed_at: Optional[float] = None
+            # when the region started changing, or the ocr last ran while it kept changing
+            changing_since: Optional[float] = None
+            interval = auto_ocr_settings["min_interval"]
+            while not self.stop_event.is_set():
                 x1, y1, x2, y2 = self.master_object.get_persistent_window_coordinates()
-                if Rectangle(x1, y1, x2, y2):
-                    new_hash = imagehash.average_hash(ImageGrab.grab(bbox=(x1, y1, x2, y2)))
-                    if not hash1:
-                        self.persistent_auto_signal.emit()
-                        hash1 = new_hash
-                    elif hash1 == new_hash:
-                        if changing:
-                            self.persistent_auto_signal.emit()
-                            changing = False
+                if not Rectangle(x1, y1, x2, y2):
+                    self.stop_event.wait(1)
+                    continue
+                with metrics.measure("auto_ocr_check"):
+                    frame = screen_capture.grab_array((x1, y1, x2, y2))
+                    hashes = compute_tile_hashes(frame, auto_ocr_settings["tile_size"])
+                if previous_hashes is None:
+                    self.trigger_ocr_if_text_changed(frame)
+                elif count_changed_tiles(previous_hashes, hashes, auto_ocr_settings["tile_tolerance"]):
+                    # poll quickly while text is appearing so the ocr starts as soon as it stops
+                    changed_at = time.monotonic()
+                    interval = auto_ocr_settings["min_interval"]
+                    if changing_since is None:
+                        changing_since = changed_at
+                    if changed_at - changing_since >= auto_ocr_settings["max_settle_seconds"]:
+                        # a region that never settles still gets its text read
+                        self.trigger_ocr_if_text_changed(frame)
+                        changing_since = changed_at
                     else:
-                        changing = True
-                    hash1 = new_hash
-                    time.sleep(0.3)
+                        metrics.increment("auto_ocr_skipped_frames")
+                elif changed_at is not None and time.monotonic() - changed_at >= auto_ocr_settings["settle_seconds"]:
+                    self.trigger_ocr_if_text_changed(frame)
+                    changed_at = None
+                    changing_since = None
                 else:
-                    time.sleep(1)
+                    if changed_at is None:
+                        # nothing is happening, back off
+                        interval = min(interval * 2, auto_ocr_settings["max_interval"])
+                    metrics.increment("auto_ocr_skipped_frames")
+                previous_hashes = hashes
+                self.stop_event.wait(interval)
+
+        def trigger_ocr_if_text_changed(self, frame: numpy.ndarray):
+            auto_ocr_settings = self.master_object.config.config_dict["auto_ocr"]
+            last_text_fingerprint = self.master_object.ocr.last_text_fingerprint
+            # animated backgrounds, portraits and blinking cursors change the frame but not the text
+            if auto_ocr_settings["skip_unchanged_text"] and last_text_fingerprint:
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGRA2GRAY)  # type: ignore
+                text_fingerprint = TextFingerprint(gray, reference=last_text_fingerprint)
+                if text_fingerprint.matches(last_text_fingerprint, auto_ocr_settings["text_tolerance_cells"]):
+                    metrics.increment("auto_ocr_suppressed")
+                    return
+            self.trigger_ocr()
+
+        def trigger_ocr(self):
+            metrics.increment("auto_ocr_triggers")
+            self.persistent_auto_signal.emit()
 
         def stop(self):
-            self.stop_signal = True
+            self.stop_event.set()
 
 
 class MainHotkeyQObject(QObject):
@@ -1353,46 +2290,122 @@ class KeyBoardManager(QObject):
         self.hotkey.start()
 
 
-class OCR:
+class OCRCancelledError(Exception):
+    pass
+
+
+class OCRJob:
+    """Lets a newer OCR request cancel an outdated one, including killing its tesseract processes"""
+
+    def __init__(self) -> None:
+        self.cancelled = threading.Event()
+        self.processes: set[subprocess.Popen] = set()
+        self.lock = threading.Lock()
+
+    def is_cancelled(self) -> bool:
+        return self.cancelled.is_set()
+
+    def cancel(self):
+        with self.lock:
+            self.cancelled.set()
+            for process in self.processes:
+                with contextlib.suppress(OSError):
+                    process.kill()
+
+    def add_process(self, process: subprocess.Popen):
+        with self.lock:
+            self.processes.add(process)
+            if self.cancelled.is_set():
+                process.kill()
+
+    def remove_process(self, process: subprocess.Popen):
+        with self.lock:
+            self.processes.discard(process)
+
+
+class OCR(QObject):
     def __init__(self, master_object: MasterObject):
+        super().__init__()
         self.master_object = master_object
         self.ocr_thread: Optional[OCR.OCRThread] = None
-        self.api = None
-        self.jpn_api = None
-        self.jpn_vert_api = None
+        # only the newest image that arrived while an ocr was running is kept, older ones are outdated
+        self.pending_image: Optional[Image.Image] = None
+        self.pending_region: Optional[tuple] = None
+        self.pending_text_fingerprint: Optional[TextFingerprint] = None
+        # text of the last successful persistent window ocr, auto ocr skips frames that still show it
+        self.last_text_fingerprint: Optional[TextFingerprint] = None
+        self.engine = TesseractEngine(master_object.config)
+        self.image_processor: Optional[ImageProcessor] = None
+        self.image_region: Optional[tuple] = None
 
     class OCRThread(QThread):
         unprocessed_signal = cast(SignalInstance, Signal(Image.Image))
         processed_signal = cast(SignalInstance, Signal(Image.Image))
         ocr_text_signal = cast(SignalInstance, Signal(str))
 
-        def __init__(self, ocr: OCR, image):
+        def __init__(
+            self,
+            ocr: OCR,
+            image,
+            region: Optional[tuple] = None,
+            text_fingerprint: Optional[TextFingerprint] = None,
+        ):
             QThread.__init__(self)
             self.image = image
+            self.region = region
+            self.text_fingerprint = text_fingerprint
             self.ocr = ocr
+            self.job = OCRJob()
 
         def run(self):
-            self.ocr.start_ocr(self.image, self.unprocessed_signal, self.processed_signal, self.ocr_text_signal)
+            try:
+                self.ocr.start_ocr(
+                    self.image,
+                    self.unprocessed_signal,
+                    self.processed_signal,
+                    self.ocr_text_signal,
+                    self.job,
+                    self.region,
+                    self.text_fingerprint,
+                )
+            except OCRCancelledError:
+                logger.debug("discarded outdated ocr")
 
     def start_ocr_in_thread(
-        self,
-        image,
+        self, image, region: Optional[tuple] = None, text_fingerprint: Optional[TextFingerprint] = None
     ):
         if image:
-            if self.ocr_thread:
-                self.ocr_thread.wait()
-            self.ocr_thread = OCR.OCRThread(self, image)
-            ocr_settings_window = self.master_object.main_window.ocr_settings_window
-            main_window = self.master_object.main_window
-            if ocr_settings_window:
-                self.ocr_thread.unprocessed_signal.connect(ocr_settings_window.refresh_unprocessed_image)
-                self.ocr_thread.processed_signal.connect(ocr_settings_window.refresh_processed_image)
-                self.ocr_thread.ocr_text_signal.connect(ocr_settings_window.refresh_ocr_text)
-            if main_window:
-                self.ocr_thread.ocr_text_signal.connect(main_window.update_linedit_text)
-            if self.master_object.main_window:
-                self.ocr_thread.processed_signal.connect(self.master_object.main_window.refresh_preview_image)
-            self.ocr_thread.start()
+            self.pending_image = image
+            self.pending_region = region
+            self.pending_text_fingerprint = text_fingerprint
+            # never block the gui, the running ocr is cancelled and the pending image starts once it finished
+            if self.ocr_thread and self.ocr_thread.isRunning():
+                self.ocr_thread.job.cancel()
+                return
+            self.start_pending_ocr()
+
+    def start_pending_ocr(self):
+        image = self.pending_image
+        region = self.pending_region
+        text_fingerprint = self.pending_text_fingerprint
+        self.pending_image = None
+        self.pending_region = None
+        self.pending_text_fingerprint = None
+        if not image:
+            return
+        self.ocr_thread = OCR.OCRThread(self, image, region, text_fingerprint)
+        ocr_settings_window = self.master_object.main_window.ocr_settings_window
+        main_window = self.master_object.main_window
+        if ocr_settings_window:
+            self.ocr_thread.unprocessed_signal.connect(ocr_settings_window.refresh_unprocessed_image)
+            self.ocr_thread.processed_signal.connect(ocr_settings_window.refresh_processed_image)
+            self.ocr_thread.ocr_text_signal.connect(ocr_settings_window.refresh_ocr_text)
+        if main_window:
+            self.ocr_thread.ocr_text_signal.connect(main_window.update_linedit_text)
+        if self.master_object.main_window:
+            self.ocr_thread.processed_signal.connect(self.master_object.main_window.refresh_preview_image)
+        self.ocr_thread.finished.connect(self.start_pending_ocr)  # type: ignore
+        self.ocr_thread.start()
 
     def start_ocr(
         self,
@@ -1400,165 +2413,1009 @@ class OCR:
         unprocessed_signal: SignalInstance,
         processed_signal: SignalInstance,
         ocr_text_signal: SignalInstance,
+        job: Optional[OCRJob] = None,
+        region: Optional[tuple] = None,
+        text_fingerprint: Optional[TextFingerprint] = None,
     ):
-        self.master_object.unprocessed_image = image.copy()
+        metrics.increment("captures")
+        # settings changes rerun the ocr on the same image, reusing its processor reuses the unaffected stages
+        if self.image_processor and image is self.image_processor.original_image:
+            image_processor = self.image_processor
+            region = region or self.image_region
+        else:
+            self.master_object.unprocessed_image = image.copy()
+            image_processor = ImageProcessor(self.master_object.config, self.master_object.unprocessed_image)
+            self.image_processor = image_processor
+        self.image_region = region
         unprocessed_signal.emit(self.master_object.unprocessed_image)
         if self.master_object.config.config_dict["auto_save_recording"]:
             self.master_object.audio_worker.save_audio_and_restart_recording()
 
-        image_processor = ImageProcessor(self.master_object.config, image)
-        image = image_processor.process_image()
-        text = self.do_ocr(image)
+        if self.master_object.config.config_dict["ocr_settings"]["enable_best_of_variants"]:
+            image, text = self.do_best_of_variants_ocr(image_processor, job, region)
+        else:
+            image = image_processor.process_image()
+            text = self.do_ocr(image, job, region)
+        if job and job.is_cancelled():
+            raise OCRCancelledError()
 
         processed_signal.emit(image)
         self.master_object.processed_image = image
         ocr_text_signal.emit(text)
 
-        process_text(text)
+        with metrics.measure("clipboard"):
+            process_text(text)
+        if text_fingerprint is not None:
+            self.last_text_fingerprint = text_fingerprint
+
+    def do_ocr(self, image: Image.Image, job: Optional[OCRJob] = None, region: Optional[tuple] = None):
+        return self.engine.recognize(image, job, region)
+
+    def do_best_of_variants_ocr(
+        self, image_processor: ImageProcessor, job: Optional[OCRJob] = None, region: Optional[tuple] = None
+    ) -> tuple[Image.Image, str]:
+        override_options = image_processor.get_variant_override_options()
+        ocr_settings = self.master_object.config.config_dict["ocr_settings"]
+        # the ocr cache keys of the variants contain their own settings
+        variant_settings = [
+            {**ocr_settings, **override_option["ocr_settings"], "force_inversion": override_option["force_inversion"]}
+            for override_option in override_options
+        ]
+        # the first variant fills the stage cache with the upscaled image, so the others only threshold it
+        first_image = image_processor.process_image(override_options[0])
+        variants: list[OCRVariant] = [(variant_settings[0], lambda: first_image)]
+        for settings, override_option in zip(variant_settings[1:], override_options[1:]):
+            variants.append(
+                (settings, lambda override_option=override_option: image_processor.process_image(override_option))
+            )
+        return self.engine.recognize_best(variants, job, region)
+
+
+class TextNormalizer:
+    """Applies all replacement rules in a single pass over the ocr text"""
+
+    BUILTIN_RULES = {
+        " ": "",
+        "いぃ": "い",
+        "\n": "",
+        "`": "「",
+        "①": "１",
+        "②": "２",
+        "③": "３",
+        "④": "４",
+        "⑤": "５",
+        "⑥": "６",
+        "⑦": "７",
+        "⑧": "８",
+        "⑨": "９",
+        "⑩": "１０",
+        "⑪": "１１",
+        "⑫": "１２",
+        "⑬": "１３",
+        "⑭": "１４",
+        "⑮": "１５",
+        "⑯": "１６",
+        "⑰": "１７",
+        "⑱": "１８",
+        "⑲": "１９",
+        "⑳": "２０",
+    }
+
+    def __init__(self, rules: dict[str, str]) -> None:
+        # single characters are handled by str.translate, everything longer by one alternation regex, longest first.
+        # characters that are part of a longer rule go into the regex too, translating them first would keep the
+        # longer rule from ever matching
+        longer_rule_characters = set("".join(key for key in rules if len(key) > 1))
+        self.translation_table = str.maketrans(
+            {key: value for key, value in rules.items() if len(key) == 1 and key not in longer_rule_characters}
+        )
+        self.replacements = {
+            key: value for key, value in rules.items() if len(key) > 1 or key in longer_rule_characters
+        }
+        self.pattern = None
+        if self.replacements:
+            keys = sorted(self.replacements, key=len, reverse=True)
+            self.pattern = re.compile("|".join(re.escape(key) for key in keys))
+
+    def normalize(self, text: str) -> str:
+        text = text.translate(self.translation_table)
+        if self.pattern:
+            text = self.pattern.sub(lambda match: self.replacements[match.group()], text)
+        return text
 
-    def do_ocr(self, image: Image.Image):
-        width, height = image.size
-        language = ""
-        path = ""
-        if platform.system() == "Windows" and tesseract_command:
-            path = os.path.abspath(tesseract_command)
-            pytesseract.pytesseract.tesseract_cmd = path
-        # else:
-        #     path = "/home/julius/Projects/tesseract/tesseract/tesseract"
-        #     pytesseract.pytesseract.tesseract_cmd = path
-        if width > height:
-            language = "jpn"
-            tesseract_config = "--oem 1 --psm 6"
+
+class OCRCache:
+    """Caches raw OCR results keyed by the processed image and all settings that influence the result"""
+
+    def __init__(self, config: Configuration) -> None:
+        self.config = config
+        # text, tesseract duration and, for entries made with confidences, the mean word confidence
+        self.entries: OrderedDict[str, tuple[str, float, Optional[float]]] = OrderedDict()
+        self.lock = threading.Lock()
+        self.cache_dir = os.path.join(user_config_dir("migaku-ocr"), "ocr_cache")
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        # tesseract time that would have been spent without the cache
+        self.saved_seconds = 0.0
+        if self.config.config_dict["ocr_cache"]["enable_disk_cache"]:
+            self.prune_disk_cache()
+
+    @staticmethod
+    def make_key(
+        image: Image.Image, language: str, psm: int, ocr_settings: dict[str, Any], with_confidence: bool = False
+    ) -> str:
+        key_hash = hashlib.blake2b(digest_size=20)
+        key_hash.update(f"{image.mode}:{image.width}x{image.height}:{language}:{psm}:{with_confidence}:".encode())
+        key_hash.update(json.dumps(ocr_settings, sort_keys=True).encode())
+        key_hash.update(image.tobytes())
+        return key_hash.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self.get_entry(key)
+        return entry[0] if entry else None
+
+    def get_with_confidence(self, key: str) -> Optional[tuple[str, float]]:
+        """Returns the text and confidence of an entry whose key was made with_confidence"""
+        entry = self.get_entry(key)
+        if not entry or entry[2] is None:
+            return None
+        return entry[0], entry[2]
+
+    def get_entry(self, key: str) -> Optional[tuple[str, float, Optional[float]]]:
+        cache_config = self.config.config_dict["ocr_cache"]
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry:
+                self.entries.move_to_end(key)
+                self.hits += 1
+        if not entry and cache_config["enable_disk_cache"]:
+            entry = self.load_from_disk(key)
+            if entry:
+                with self.lock:
+                    self.disk_hits += 1
+                    self.store_in_memory(key, entry)
+        if not entry:
+            with self.lock:
+                self.misses += 1
+            metrics.increment("ocr_cache_misses")
+            return None
+        with self.lock:
+            self.saved_seconds += entry[1]
+        metrics.increment("ocr_cache_hits")
+        logger.debug(f"ocr cache hit, {self.get_stats()}")
+        return entry
+
+    def put(self, key: str, text: str, duration: float, confidence: Optional[float] = None):
+        with self.lock:
+            self.store_in_memory(key, (text, duration, confidence))
+        if self.config.config_dict["ocr_cache"]["enable_disk_cache"]:
+            self.save_to_disk(key, (text, duration, confidence))
+
+    def store_in_memory(self, key: str, entry: tuple[str, float, Optional[float]]):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.config.config_dict["ocr_cache"]["max_entries"]:
+            self.entries.popitem(last=False)
+
+    def load_from_disk(self, key: str) -> Optional[tuple[str, float, Optional[float]]]:
+        try:
+            with open(os.path.join(self.cache_dir, f"{key}.json"), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            return entry["text"], entry["duration"], entry.get("confidence")
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def save_to_disk(self, key: str, entry: tuple[str, float, Optional[float]]):
+        text, duration, confidence = entry
+        try:
+            pathlib.Path(self.cache_dir).mkdir(parents=True, exist_ok=True)
+            with open(os.path.join(self.cache_dir, f"{key}.json"), "w", encoding="utf-8") as f:
+                json.dump({"text": text, "duration": duration, "confidence": confidence}, f, ensure_ascii=False)
+        except OSError as e:
+            logger.warning(f"could not write ocr cache entry: {e}")
+
+    def prune_disk_cache(self):
+        # only done on startup, removes the least recently written entries
+        cache_files = sorted(pathlib.Path(self.cache_dir).glob("*.json"), key=lambda path: path.stat().st_mtime)
+        for path in cache_files[: max(0, len(cache_files) - self.config.config_dict["ocr_cache"]["max_disk_entries"])]:
+            with contextlib.suppress(OSError):
+                path.unlink()
+
+    def get_stats(self) -> dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "entries": len(self.entries),
+            "saved_seconds": round(self.saved_seconds, 3),
+        }
+
+
+ORIENTATIONS = {"horizontal": ("jpn", 6), "vertical": ("jpn_vert", 5)}
+
+# the ocr settings of a best of variants variant and the function that preprocesses its image
+OCRVariant = tuple[dict[str, Any], Callable[[], Image.Image]]
+
+
+def get_language_and_psm(image: Image.Image) -> tuple[str, int]:
+    width, height = image.size
+    if width > height:
+        return ORIENTATIONS["horizontal"]
+    else:
+        return ORIENTATIONS["vertical"]
+
+
+def parse_tesseract_tsv(tsv: str) -> tuple[str, float]:
+    """Returns the text and the mean word confidence of tesseract's tsv output"""
+    lines: dict[tuple[str, str, str], list[str]] = {}
+    confidences = []
+    for row in tsv.splitlines()[1:]:
+        columns = row.split("\t")
+        # only word level rows (level 5) contain text
+        if len(columns) < 12 or columns[0] != "5":
+            continue
+        lines.setdefault((columns[2], columns[3], columns[4]), []).append(columns[11])
+        if float(columns[10]) >= 0:
+            confidences.append(float(columns[10]))
+    text = "\n".join(" ".join(words) for words in lines.values())
+    return text, statistics.mean(confidences) if confidences else 0.0
+
+
+def find_text_bands(image: Image.Image, vertical: bool, min_gap: int = 4) -> list[tuple[int, int]]:
+    """Returns the (start, end) of text lines, or of text columns if vertical, separated by blank space"""
+    # the processed image contains dark text on a light background
+    ink = numpy.asarray(image.convert("L")) < 128
+    profile = ink.any(axis=0 if vertical else 1)
+
+    # rising and falling edges of the padded profile are the starts and (exclusive) ends of the bands
+    padded_profile = numpy.concatenate(([False], profile, [False])).astype(numpy.int8)
+    bands: list[list[int]] = numpy.flatnonzero(numpy.diff(padded_profile)).reshape(-1, 2).tolist()
+
+    merged: list[list[int]] = []
+    for band in bands:
+        if merged and band[0] - merged[-1][1] < min_gap:
+            merged[-1][1] = band[1]
+        else:
+            merged.append(band)
+
+    # punctuation, dakuten and similar small marks can end up as separate bands, attach them to their neighbor
+    if len(merged) > 1:
+        median_size = statistics.median(end - start for start, end in merged)
+        index = 0
+        while len(merged) > 1 and index < len(merged):
+            start, end = merged[index]
+            if end - start >= median_size / 3:
+                index += 1
+                continue
+            if index == 0:
+                neighbor = 1
+            elif index == len(merged) - 1:
+                neighbor = index - 1
+            else:
+                gap_before = start - merged[index - 1][1]
+                gap_after = merged[index + 1][0] - end
+                neighbor = index - 1 if gap_before <= gap_after else index + 1
+            merged[neighbor] = [min(start, merged[neighbor][0]), max(end, merged[neighbor][1])]
+            del merged[index]
+            index = 0
+
+    # cut in the middle of the blank space, so every band keeps some white margin around the text
+    cuts = [0] + [(previous[1] + following[0]) // 2 for previous, following in zip(merged, merged[1:])]
+    cuts.append(len(profile))
+    return list(zip(cuts, cuts[1:])) if merged else []
+
+
+class TesseractEngine:
+    """Runs tesseract either through warm in-process tesserocr handles or through the tesseract binary"""
+
+    MAX_REMEMBERED_REGIONS = 16
+
+    def __init__(self, config: Configuration) -> None:
+        self.config = config
+        # idle tesserocr handles per (language, psm), a handle is only ever used by one thread at a time
+        self.idle_apis: dict[tuple[str, int], list[Any]] = {}
+        self.apis_lock = threading.Lock()
+        self.warned_about_missing_tesserocr = False
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.cache = OCRCache(config)
+        self.normalizer: Optional[TextNormalizer] = None
+        self.normalizer_rules_key = ""
+        # orientation that won the speculative ocr, per persistent window region, least recently used first
+        self.orientation_by_region: OrderedDict[tuple, str] = OrderedDict()
+        self.orientation_settings_key = ""
+        self.orientation_lock = threading.Lock()
+
+    def get_engine_name(self) -> str:
+        engine_name = self.config.config_dict["ocr_settings"]["ocr_engine"]
+        if engine_name != "tesserocr":
+            return "subprocess"
+        if not PyTessBaseAPI:
+            if not self.warned_about_missing_tesserocr:
+                logger.warning("tesserocr is not installed, falling back to the tesseract binary")
+                self.warned_about_missing_tesserocr = True
+            return "subprocess"
+        return engine_name
+
+    def recognize(self, image: Image.Image, job: Optional[OCRJob] = None, region: Optional[tuple] = None) -> str:
+        ocr_settings = self.config.config_dict["ocr_settings"]
+        orientation = self.get_region_orientation(region)
+        # only persistent window regions are ocred speculatively, as only they can reuse the winning orientation
+        speculative = ocr_settings["speculative_orientation"] and region is not None and orientation is None
+        if orientation:
+            language, psm = ORIENTATIONS[orientation]
+        elif speculative:
+            language, psm = "speculative", 0
         else:
-            language = "jpn_vert"
-            tesseract_config = "--oem 1 --psm 5"
-        text = pytesseract.image_to_string(image, lang=language, config=tesseract_config)
-        text = text.strip()
-
-        for (f, t) in [
-            (" ", ""),
-            ("いぃ", "い"),
-            ("\n", ""),
-            ("`", "「"),
-            ("①", "１"),
-            ("②", "２"),
-            ("③", "３"),
-            ("④", "４"),
-            ("⑤", "５"),
-            ("⑥", "６"),
-            ("⑦", "７"),
-            ("⑧", "８"),
-            ("⑨", "９"),
-            ("⑩", "１０"),
-            ("⑪", "１１"),
-            ("⑫", "１２"),
-            ("⑬", "１３"),
-            ("⑭", "１４"),
-            ("⑮", "１５"),
-            ("⑯", "１６"),
-            ("⑰", "１７"),
-            ("⑱", "１８"),
-            ("⑲", "１９"),
-            ("⑳", "２０"),
-        ]:
-            text = text.replace(f, t)
+            language, psm = get_language_and_psm(image)
+        cache_key = self.cache.make_key(image, language, psm, ocr_settings)
+        text = self.cache.get(cache_key)
+        if text is None:
+            start = time.perf_counter()
+            if speculative:
+                text = self.speculative_image_to_string(image, job, region)
+            elif (
+                ocr_settings["enable_tiled_ocr"] and image.width * image.height >= ocr_settings["tiled_ocr_min_pixels"]
+            ):
+                text = self.tiled_image_to_string(image, language, psm, job)
+            else:
+                text = self.image_to_string(image, language, psm, job)
+            duration = time.perf_counter() - start
+            metrics.observe("tesseract", duration)
+            self.cache.put(cache_key, text, duration)
+        text = self.get_normalizer().normalize(text.strip())
         logger.info(text)
         return text
 
+    def recognize_best(
+        self,
+        variants: list[OCRVariant],
+        job: Optional[OCRJob] = None,
+        region: Optional[tuple] = None,
+    ) -> tuple[Image.Image, str]:
+        """Produces and ocrs every variant in parallel and returns the most confident one"""
+
+        orientation = self.get_region_orientation(region)
+
+        def produce_and_ocr(variant: OCRVariant) -> tuple[Image.Image, str, float]:
+            ocr_settings, produce_image = variant
+            image = produce_image()
+            if orientation:
+                language, psm = ORIENTATIONS[orientation]
+            else:
+                language, psm = get_language_and_psm(image)
+            cache_key = self.cache.make_key(image, language, psm, ocr_settings, with_confidence=True)
+            if cached := self.cache.get_with_confidence(cache_key):
+                return (image, *cached)
+            start = time.perf_counter()
+            # the variants already keep every core busy, so the tiles of a variant are ocred one after another
+            if ocr_settings["enable_tiled_ocr"] and image.width * image.height >= ocr_settings["tiled_ocr_min_pixels"]:
+                text, confidence = self.tiled_image_to_data(image, language, psm, job)
+            else:
+                text, confidence = self.image_to_data(image, language, psm, job)
+            self.cache.put(cache_key, text, time.perf_counter() - start, confidence)
+            return image, text, confidence
+
+        start = time.perf_counter()
+        results = list(self.get_executor().map(produce_and_ocr, variants))
+        # includes the preprocessing of the variants, so it's kept apart from the tesseract stage
+        metrics.observe("best_of_variants", time.perf_counter() - start)
+        image, text, confidence = max(results, key=lambda result: result[2])
+        logger.debug(
+            f"best variant confidence {confidence:.0f}, all: " + ", ".join(f"{result[2]:.0f}" for result in results)
+        )
+        text = self.get_normalizer().normalize(text.strip())
+        logger.info(text)
+        return image, text
+
+    def get_normalizer(self) -> TextNormalizer:
+        normalization_config = self.config.config_dict["text_normalization"]
+        game_rules = normalization_config["game_rules"].get(normalization_config["active_game"], {})
+        rules_key = json.dumps([normalization_config["rules"], game_rules], sort_keys=True)
+        # only recompile when the rules changed
+        if not self.normalizer or rules_key != self.normalizer_rules_key:
+            rules = {**TextNormalizer.BUILTIN_RULES, **normalization_config["rules"], **game_rules}
+            self.normalizer = TextNormalizer({key: value for key, value in rules.items() if key})
+            self.normalizer_rules_key = rules_key
+        return self.normalizer
+
+    def speculative_image_to_string(
+        self, image: Image.Image, job: Optional[OCRJob] = None, region: Optional[tuple] = None
+    ) -> str:
+        # ocr both orientations at the same time and keep the one tesseract is more confident about
+        futures = {
+            orientation: self.get_executor().submit(self.image_to_data, image, language, psm, job)
+            for orientation, (language, psm) in ORIENTATIONS.items()
+        }
+        results = {orientation: future.result() for orientation, future in futures.items()}
+        orientation = max(results, key=lambda orientation: results[orientation][1])
+        logger.debug(
+            f"speculative ocr picked {orientation}, confidences: "
+            + ", ".join(f"{name} {confidence:.0f}" for name, (_, confidence) in results.items())
+        )
+        if region is not None:
+            # later captures of the same region use this orientation directly
+            self.remember_region_orientation(region, orientation)
+        return results[orientation][0]
+
+    def get_region_orientation(self, region: Optional[tuple]) -> Optional[str]:
+        """The orientation speculative ocr picked for region, all of them are forgotten when the ocr settings change"""
+        settings_key = json.dumps(self.config.config_dict["ocr_settings"], sort_keys=True)
+        with self.orientation_lock:
+            if settings_key != self.orientation_settings_key:
+                self.orientation_by_region.clear()
+                self.orientation_settings_key = settings_key
+            if region is None or region not in self.orientation_by_region:
+                return None
+            self.orientation_by_region.move_to_end(region)
+            return self.orientation_by_region[region]
+
+    def remember_region_orientation(self, region: tuple, orientation: str):
+        with self.orientation_lock:
+            self.orientation_by_region[region] = orientation
+            self.orientation_by_region.move_to_end(region)
+            while len(self.orientation_by_region) > self.MAX_REMEMBERED_REGIONS:
+                self.orientation_by_region.popitem(last=False)
+
+    def image_to_string(self, image: Image.Image, language: str, psm: int, job: Optional[OCRJob] = None) -> str:
+        return self.run_engine(image, language, psm, job, with_confidence=False)[0]
+
+    def image_to_data(
+        self, image: Image.Image, language: str, psm: int, job: Optional[OCRJob] = None
+    ) -> tuple[str, float]:
+        """Returns the text and tesseract's mean word confidence from 0 to 100"""
+        return self.run_engine(image, language, psm, job, with_confidence=True)
+
+    def run_engine(
+        self, image: Image.Image, language: str, psm: int, job: Optional[OCRJob], with_confidence: bool
+    ) -> tuple[str, float]:
+        if job and job.is_cancelled():
+            raise OCRCancelledError()
+        if self.get_engine_name() == "tesserocr":
+            result = self.tesserocr_recognize(image, language, psm, with_confidence)
+        else:
+            result = self.subprocess_recognize(image, language, psm, job, with_confidence)
+        # tesserocr can't be interrupted, its result is thrown away instead
+        if job and job.is_cancelled():
+            raise OCRCancelledError()
+        return result
+
+    def get_executor(self) -> ThreadPoolExecutor:
+        # both tesseract subprocesses and tesserocr release the GIL, so threads are enough to use all cores
+        if not self.executor:
+            self.executor = ThreadPoolExecutor(max_workers=os.cpu_count(), thread_name_prefix="ocr-worker")
+        return self.executor
+
+    def tiled_image_to_string(self, image: Image.Image, language: str, psm: int, job: Optional[OCRJob] = None) -> str:
+        vertical = language == "jpn_vert"
+        bands = find_text_bands(image, vertical)
+        if len(bands) < 2:
+            return self.image_to_string(image, language, psm, job)
+        # vertical japanese is read from the rightmost column to the left
+        if vertical:
+            tiles = [image.crop((start, 0, end, image.height)) for start, end in reversed(bands)]
+        else:
+            tiles = [image.crop((0, start, image.width, end)) for start, end in bands]
+        logger.debug(f"ocr of {len(tiles)} tiles in parallel")
+        texts = self.get_executor().map(lambda tile: self.image_to_string(tile, language, psm, job), tiles)
+        return "\n".join(text.strip() for text in texts)
+
+    def tiled_image_to_data(
+        self, image: Image.Image, language: str, psm: int, job: Optional[OCRJob] = None
+    ) -> tuple[str, float]:
+        """Like tiled_image_to_string, but ocrs the tiles in the calling thread and also returns the confidence"""
+        vertical = language == "jpn_vert"
+        bands = find_text_bands(image, vertical)
+        if len(bands) < 2:
+            return self.image_to_data(image, language, psm, job)
+        if vertical:
+            tiles = [image.crop((start, 0, end, image.height)) for start, end in reversed(bands)]
+        else:
+            tiles = [image.crop((0, start, image.width, end)) for start, end in bands]
+        results = [self.image_to_data(tile, language, psm, job) for tile in tiles]
+        texts = [text.strip() for text, _ in results]
+        # every tile's confidence counts as much as the text it contributes
+        weights = [len(text) for text in texts]
+        if sum(weights):
+            confidence = sum(weight * result[1] for weight, result in zip(weights, results)) / sum(weights)
+        else:
+            confidence = statistics.mean(result[1] for result in results)
+        return "\n".join(texts), confidence
+
+    def subprocess_recognize(
+        self, image: Image.Image, language: str, psm: int, job: Optional[OCRJob], with_confidence: bool
+    ) -> tuple[str, float]:
+        if platform.system() == "Windows" and tesseract_command:
+            command = os.path.abspath(tesseract_command)
+        else:
+            command = pytesseract.pytesseract.tesseract_cmd
+        if image.mode not in ("1", "L", "RGB"):
+            image = image.convert("RGB")
+        # pnm is the cheapest format to encode that tesseract can read from stdin
+        image_buffer = io.BytesIO()
+        image.save(image_buffer, format="PPM")
+        process = subprocess.Popen(
+            [command, "stdin", "stdout", "-l", language, "--oem", "1", "--psm", str(psm)]
+            + (["tsv"] if with_confidence else []),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            creationflags=subprocess.CREATE_NO_WINDOW if platform.system() == "Windows" else 0,  # type: ignore
+        )
+        if job:
+            job.add_process(process)
+        try:
+            output, error_output = process.communicate(image_buffer.getvalue())
+        finally:
+            if job:
+                job.remove_process(process)
+        if job and job.is_cancelled():
+            raise OCRCancelledError()
+        if process.returncode != 0:
+            raise RuntimeError(f"tesseract failed: {error_output.decode(errors='replace').strip()}")
+        if with_confidence:
+            return parse_tesseract_tsv(output.decode("utf-8"))
+        return output.decode("utf-8"), -1.0
+
+    def tesserocr_recognize(
+        self, image: Image.Image, language: str, psm: int, with_confidence: bool
+    ) -> tuple[str, float]:
+        if image.mode not in ("L", "RGB"):
+            image = image.convert("RGB")
+        bytes_per_pixel = len(image.getbands())
+        api = self.acquire_api(language, psm)
+        try:
+            # hand over the raw pixel buffer, this avoids encoding the image to a file format first
+            api.SetImageBytes(
+                image.tobytes(), image.width, image.height, bytes_per_pixel, image.width * bytes_per_pixel
+            )
+            text = api.GetUTF8Text()
+            return text, api.MeanTextConf() if with_confidence else -1.0
+        finally:
+            self.release_api(language, psm, api)
+
+    def acquire_api(self, language: str, psm: int):
+        with self.apis_lock:
+            idle_apis = self.idle_apis.setdefault((language, psm), [])
+            if idle_apis:
+                return idle_apis.pop()
+        logger.debug(f"loading tesserocr model {language} with psm {psm}")
+        kwargs: dict[str, Any] = {"lang": language, "psm": psm, "oem": OEM.LSTM_ONLY}
+        if platform.system() == "Windows" and tesseract_command:
+            kwargs["path"] = os.path.join(os.path.dirname(os.path.abspath(tesseract_command)), "tessdata")
+        return PyTessBaseAPI(**kwargs)
+
+    def release_api(self, language: str, psm: int, api):
+        api.Clear()
+        with self.apis_lock:
+            self.idle_apis.setdefault((language, psm), []).append(api)
+
+    def close(self):
+        if self.executor:
+            self.executor.shutdown()
+            self.executor = None
+        with self.apis_lock:
+            for api in itertools.chain.from_iterable(self.idle_apis.values()):
+                api.End()
+            self.idle_apis.clear()
+
+
+def find_text_box(image: numpy.ndarray, padding: int = 4) -> Optional[tuple[int, int, int, int]]:
+    """Returns the bounding box of all text-like regions, or None if it wouldn't make the image smaller"""
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)  # type: ignore
+    height, width = gray.shape
+    # glyphs have dense strong edges, while game backgrounds are mostly smooth
+    gradient = cv2.morphologyEx(gray, cv2.MORPH_GRADIENT, numpy.ones((3, 3), numpy.uint8))  # type: ignore
+    _, edges = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)  # type: ignore
+    # merge the strokes of neighboring glyphs into text blocks, square so it works for vertical text too
+    text_blocks = cv2.morphologyEx(edges, cv2.MORPH_CLOSE, numpy.ones((7, 7), numpy.uint8))  # type: ignore
+    _, _, stats, _ = cv2.connectedComponentsWithStats(text_blocks, connectivity=8)  # type: ignore
+
+    min_area = max(20, width * height // 2000)
+    boxes = [
+        (x, y, x + w, y + h)
+        for x, y, w, h, area in stats[1:]
+        # skip noise as well as lines and borders that span the whole capture
+        if area >= min_area and min(w, h) >= 4 and not (w >= width * 0.98 and h <= 3 + height * 0.02)
+    ]
+    if not boxes:
+        return None
+    x1 = max(0, min(box[0] for box in boxes) - padding)
+    y1 = max(0, min(box[1] for box in boxes) - padding)
+    x2 = min(width, max(box[2] for box in boxes) + padding)
+    y2 = min(height, max(box[3] for box in boxes) + padding)
+    if (x2 - x1) * (y2 - y1) > width * height * 0.9:
+        return None
+    return (int(x1), int(y1), int(x2), int(y2))
+
+
+def binarize_text(gray: numpy.ndarray, threshold: Optional[float] = None) -> tuple[float, numpy.ndarray]:
+    """Binarizes gray at threshold, or Otsu's if none is given, so the text ends up white on black"""
+    if threshold is None:
+        threshold, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)  # type: ignore
+    else:
+        _, binary = cv2.threshold(gray, threshold, 255, cv2.THRESH_BINARY)  # type: ignore
+    # text covers less of the capture than the background
+    if cv2.countNonZero(binary) > binary.size // 2:  # type: ignore
+        binary = cv2.bitwise_not(binary)  # type: ignore
+    return threshold, binary
+
+
+def glyph_height_from_stats(stats: numpy.ndarray, width: int, height: int) -> Optional[float]:
+    heights = [
+        h
+        for _, _, w, h, area in stats[1:]
+        # skip noise as well as lines and borders
+        if area >= 4 and w < width * 0.5 and not (h >= height * 0.9 and w * 4 < h)
+    ]
+    if not heights:
+        return None
+    # glyphs are often split into several components, the taller ones are closest to the full glyph
+    return float(numpy.percentile(heights, 75))
+
+
+def estimate_glyph_height(image: numpy.ndarray) -> Optional[float]:
+    """Estimates the glyph height in pixels from the connected components of the binarized image"""
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)  # type: ignore
+    height, width = gray.shape
+    _, binary = binarize_text(gray)
+    _, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)  # type: ignore
+    return glyph_height_from_stats(stats, width, height)
+
+
+class TextFingerprint:
+    """Downsampled text lines of a capture, to tell whether it still shows the same text"""
+
+    CELL_SIZE = 2
+    # how much of a cell has to be covered or uncovered for it to count as changed, out of 255
+    COVERAGE_CHANGE = 96
+    # fewer components than this next to each other are a cursor or an icon rather than text
+    MIN_LINE_COMPONENTS = 3
+    # components thicker than this part of their size are solid shapes like cursors rather than strokes
+    SOLID_THICKNESS = 0.2
+
+    def __init__(self, gray: numpy.ndarray, reference: Optional[TextFingerprint] = None) -> None:
+        # measured like the reference, so a cursor shifting the threshold or the glyph height can't change the rest
+        self.threshold, binary = binarize_text(gray, reference.threshold if reference else None)
+        height, width = binary.shape
+        _, labels, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)  # type: ignore
+        self.glyph_height = reference.glyph_height if reference else glyph_height_from_stats(stats, width, height)
+        text = self.text_lines(binary, labels, stats)
+        size = (max(1, width // self.CELL_SIZE), max(1, height // self.CELL_SIZE))
+        self.coverage = cv2.resize(text, size, interpolation=cv2.INTER_AREA)  # type: ignore
+
+    def text_lines(self, binary: numpy.ndarray, labels: numpy.ndarray, stats: numpy.ndarray) -> numpy.ndarray:
+        """Keeps the components that sit in a line with other glyphs"""
+        if self.glyph_height is None:
+            return numpy.zeros_like(binary)
+        # portraits and other artwork binarize to blobs much taller than the text
+        is_glyph = stats[:, cv2.CC_STAT_HEIGHT] <= self.glyph_height * 2  # type: ignore
+        is_glyph[0] = False
+        # glyphs are made of strokes, cursors and icons are solid shapes, the distance to the background tells
+        # how thick a component is
+        distances = cv2.distanceTransform(binary, cv2.DIST_L2, 3)  # type: ignore
+        thickness = numpy.zeros(len(stats), numpy.float32)
+        foreground = distances > 0
+        numpy.maximum.at(thickness, labels[foreground], distances[foreground])
+        size = stats[:, [cv2.CC_STAT_WIDTH, cv2.CC_STAT_HEIGHT]].max(axis=1)  # type: ignore
+        is_glyph &= thickness <= size * self.SOLID_THICKNESS
+        glyphs = is_glyph[labels]
+        # neighbouring glyphs, accents and dots join into one blob per line
+        kernel = numpy.ones((max(1, round(self.glyph_height / 2)), max(1, round(self.glyph_height * 2))), numpy.uint8)
+        line_count, line_labels = cv2.connectedComponents(  # type: ignore
+            cv2.dilate(glyphs.astype(numpy.uint8), kernel), connectivity=8  # type: ignore
+        )
+        # all pixels of a component are in the same line
+        component_lines = numpy.zeros(len(stats), numpy.int32)
+        component_lines[labels[glyphs]] = line_labels[glyphs]
+        components_per_line = numpy.bincount(component_lines[is_glyph], minlength=line_count)
+        is_text_line = components_per_line >= self.MIN_LINE_COMPONENTS
+        return numpy.where(glyphs & is_text_line[line_labels], binary, 0).astype(numpy.uint8)
+
+    def matches(self, other: TextFingerprint, tolerance_cells: int) -> bool:
+        if self.coverage.shape != other.coverage.shape:
+            return False
+        # noise flips single pixels at the glyph edges, a changed glyph uncovers or covers whole cells
+        changed_cells = cv2.absdiff(self.coverage, other.coverage) > self.COVERAGE_CHANGE  # type: ignore
+        return numpy.count_nonzero(changed_cells) <= tolerance_cells
+
 
 class ImageProcessor:
+    # upscaled 1080p captures are tens of megabytes each, so the cache is limited by size rather than entries
+    STAGE_CACHE_BYTES = 150 * 1024 * 1024
+    THRESHOLDING_METHODS = ["manual", "otsu", "adaptive", "sauvola"]
+
     def __init__(self, config: Configuration, original_image: Image.Image) -> None:
         self.config = config
         self.original_image = original_image
         self.inverted = False
+        # duration of each stage of the last process_image call in seconds
+        self.timings: dict[str, float] = {}
+        # results of the cacheable stages for the original image, keyed by the settings they depend on
+        self.stage_cache: OrderedDict[tuple, numpy.ndarray] = OrderedDict()
+        self.stage_cache_bytes = 0
+        self.stage_cache_lock = threading.Lock()
+        # bytes allocated by each stage, only recorded while tracemalloc is tracing
+        self.allocations: dict[str, int] = {}
+
+    def get_variant_override_options(self) -> list[dict[str, Any]]:
+        """Returns the settings of every variant for the best of variants ocr"""
+        override_options = []
+        thresholding_values: list[Optional[int]] = [
+            *self.config.config_dict["ocr_settings"]["variant_thresholding_values"],
+            None,
+        ]
+        for thresholding_value, force_inversion in itertools.product(thresholding_values, (False, True)):
+            ocr_settings: dict[str, Any] = {"enable_thresholding": thresholding_value is not None}
+            if thresholding_value is not None:
+                ocr_settings["thresholding_method"] = "manual"
+                ocr_settings["thresholding_value"] = thresholding_value
+            override_options.append({"ocr_settings": ocr_settings, "force_inversion": force_inversion})
+        return override_options
 
     def process_image(self, override_option: Optional[dict[str, Any]] = None) -> Image.Image:
         config_dict = self.config.config_dict
         if override_option:
             override_option_copy = override_option.copy()
             config_dict = merge(override_option_copy, self.config.config_dict.copy())
-        image = self.original_image.copy()
-
-        image = self.increase_image_size(config_dict, image)
-        image = self.threshold_image(config_dict, image)
-        image = self.smart_invert_image(config_dict, image)
-        image = self.add_border(image)
-
+        ocr_settings = config_dict["ocr_settings"]
+        # variants are processed concurrently, so the timings are only published at the end
+        timings: dict[str, float] = {}
+
+        # all stages work on one uint8 array, cached results are never modified in place
+        image = self.run_stage("to_numpy", timings, self.pillow_to_numpy, self.original_image, cache_key=("to_numpy",))
+        # every key contains the settings of all previous stages, so changing a setting only reruns the
+        # stages from the first one that depends on it
+        crop_key = ("crop_to_text", ocr_settings["crop_to_text"])
+        image = self.run_stage("crop_to_text", timings, self.crop_to_text, config_dict, image, cache_key=crop_key)
+        if ocr_settings["enable_thresholding"] and ocr_settings["thresholding_method"] in self.THRESHOLDING_METHODS[1:]:
+            image = self.process_native_resolution_thresholding(config_dict, image, timings, crop_key)
+        else:
+            # the inversion is decided on the native resolution image, the upscaled one has the same colors
+            native_image = image
+            upscale_amount = self.get_upscale_amount(config_dict, native_image, timings, crop_key)
+            upscale_key = crop_key + ("increase_image_size", upscale_amount)
+            image = self.run_stage(
+                "increase_image_size", timings, self.increase_image_size, image, upscale_amount, cache_key=upscale_key
+            )
+            if ocr_settings["enable_thresholding"]:
+                thresholding_value = ocr_settings["thresholding_value"]
+                grayscale_key = upscale_key + ("convert_to_grayscale", True)
+                image = self.run_stage(
+                    "convert_to_grayscale", timings, self.convert_to_grayscale, image, cache_key=grayscale_key
+                )
+                invert = self.detect_inversion(
+                    config_dict,
+                    timings,
+                    crop_key + ("detect_inversion", thresholding_value),
+                    self.is_mostly_black_after_thresholding,
+                    native_image,
+                    thresholding_value,
+                )
+                image = self.run_stage(
+                    "threshold_image", timings, self.threshold_and_invert_image, config_dict, image, invert
+                )
+            else:
+                invert = self.detect_inversion(
+                    config_dict, timings, crop_key + ("detect_inversion",), self.is_dominant_color_dark, native_image
+                )
+                image = self.run_stage("smart_invert_image", timings, self.invert_image, image, invert)
+        image = self.run_stage("add_border", timings, self.add_border, image)
+        pillow_image = self.run_stage("to_pillow", timings, Image.fromarray, image)
+
+        self.timings = timings
+        return pillow_image
+
+    def process_native_resolution_thresholding(
+        self, config_dict: dict, image: numpy.ndarray, timings: dict[str, float], crop_key: tuple
+    ) -> numpy.ndarray:
+        # automatic thresholds work on the small native resolution image and only the binary mask is upscaled
+        ocr_settings = config_dict["ocr_settings"]
+        upscale_amount = self.get_upscale_amount(config_dict, image, timings, crop_key)
+        grayscale_key = crop_key + ("convert_to_grayscale", True)
+        threshold_key = grayscale_key + ("threshold_image", ocr_settings["thresholding_method"])
+        upscale_key = threshold_key + ("increase_image_size", upscale_amount)
+
+        image = self.run_stage(
+            "convert_to_grayscale", timings, self.convert_to_grayscale, image, cache_key=grayscale_key
+        )
+        image = self.run_stage(
+            "threshold_image", timings, self.threshold_image, config_dict, image, cache_key=threshold_key
+        )
+        invert = self.detect_inversion(
+            config_dict, timings, threshold_key + ("detect_inversion",), self.is_dominant_color_dark, image
+        )
+        image = self.run_stage(
+            "increase_image_size",
+            timings,
+            self.increase_image_size,
+            image,
+            upscale_amount,
+            cv2.INTER_NEAREST,  # type: ignore
+            cache_key=upscale_key,
+        )
+        return self.run_stage("smart_invert_image", timings, self.invert_image, image, invert)
+
+    def run_stage(self, name: str, timings: dict[str, float], stage, *args, cache_key: Optional[tuple] = None):
+        start = time.perf_counter()
+        if cache_key is not None:
+            with self.stage_cache_lock:
+                result = self.stage_cache.get(cache_key)
+                if result is not None:
+                    self.stage_cache.move_to_end(cache_key)
+            if result is not None:
+                timings[name] = time.perf_counter() - start
+                metrics.increment("preprocessing_stage_cache_hits")
+                return result
+        # only the benchmark traces allocations
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            allocated_before = tracemalloc.get_traced_memory()[0]
+        result = stage(*args)
+        timings[name] = time.perf_counter() - start
+        if tracing:
+            self.allocations[name] = tracemalloc.get_traced_memory()[1] - allocated_before
+        metrics.observe(name, timings[name])
+        if isinstance(result, numpy.ndarray) and cache_key is not None:
+            # later calls share the cached array, so nothing may write to it
+            result.flags.writeable = False
+        if cache_key is not None:
+            with self.stage_cache_lock:
+                # only the current upscale amount's images are kept, stepping through amounts would otherwise
+                # fill the cache with the largest arrays
+                upscale_key = self.get_upscale_key(cache_key)
+                if upscale_key:
+                    upscale_keys = {self.get_upscale_key(key) for key in self.stage_cache} - {None, upscale_key}
+                    for key in [key for key in self.stage_cache if self.get_upscale_key(key) in upscale_keys]:
+                        self.stage_cache_bytes -= getattr(self.stage_cache.pop(key), "nbytes", 0)
+                # two variants can compute the same stage at once
+                self.stage_cache_bytes -= getattr(self.stage_cache.pop(cache_key, None), "nbytes", 0)
+                self.stage_cache[cache_key] = result
+                self.stage_cache_bytes += getattr(result, "nbytes", 0)
+                # the newest entry stays even if it's larger than the limit on its own
+                while self.stage_cache_bytes > self.STAGE_CACHE_BYTES and len(self.stage_cache) > 1:
+                    _, evicted = self.stage_cache.popitem(last=False)
+                    self.stage_cache_bytes -= getattr(evicted, "nbytes", 0)
+        return result
+
+    @staticmethod
+    def get_upscale_key(cache_key: tuple) -> Optional[tuple]:
+        """The key of the upscaled image the cached stage result was made from"""
+        if "increase_image_size" not in cache_key:
+            return None
+        return cache_key[: cache_key.index("increase_image_size") + 2]
+
+    def pillow_to_numpy(self, image: Image.Image) -> numpy.ndarray:
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        return numpy.asarray(image)
+
+    def crop_to_text(self, config_dict: dict, image: numpy.ndarray) -> numpy.ndarray:
+        if not config_dict["ocr_settings"]["crop_to_text"]:
+            return image
+        text_box = find_text_box(image)
+        if text_box:
+            x1, y1, x2, y2 = text_box
+            return image[y1:y2, x1:x2]
         return image
 
-    def add_border(self, image: Image.Image) -> Image.Image:
+    def add_border(self, image: numpy.ndarray) -> numpy.ndarray:
         if self.config.config_dict["ocr_settings"]["add_border"]:
-            return ImageOps.expand(image, 10, fill="white")
+            return cv2.copyMakeBorder(image, 10, 10, 10, 10, cv2.BORDER_CONSTANT, value=(255, 255, 255))  # type: ignore
         else:
             return image
 
-    def increase_image_size(self, config_dict: dict, image: Union[numpy.ndarray, Image.Image]) -> Image.Image:
-        image = self.smart_convert_to_pillow(image)
-        upscale_amount = config_dict["ocr_settings"]["upscale_amount"]
-        image = image.resize((image.width * upscale_amount, image.height * upscale_amount))
-        return image
-
-    def threshold_image(self, config_dict: dict, image: Image.Image) -> Image.Image:
-        if not config_dict["ocr_settings"]["enable_thresholding"]:
+    def get_upscale_amount(
+        self, config_dict: dict, image: numpy.ndarray, timings: dict[str, float], crop_key: tuple
+    ) -> float:
+        ocr_settings = config_dict["ocr_settings"]
+        if not ocr_settings["auto_upscale"]:
+            return ocr_settings["upscale_amount"]
+        glyph_height = self.run_stage(
+            "estimate_glyph_height", timings, estimate_glyph_height, image, cache_key=crop_key + ("glyph_height",)
+        )
+        if not glyph_height:
+            return ocr_settings["upscale_amount"]
+        # the smallest scale that brings the glyphs into the range, glyphs that already fit keep their size
+        if glyph_height < ocr_settings["min_glyph_height"]:
+            upscale_amount = ocr_settings["min_glyph_height"] / glyph_height
+        else:
+            upscale_amount = min(1.0, ocr_settings["max_glyph_height"] / glyph_height)
+        upscale_amount = round(min(max(upscale_amount, 0.5), 6.0), 2)
+        logger.debug(f"estimated glyph height {glyph_height:.0f}px, upscaling by {upscale_amount}")
+        return upscale_amount
+
+    def increase_image_size(
+        self, image: numpy.ndarray, upscale_amount: float, interpolation: int = cv2.INTER_CUBIC  # type: ignore
+    ) -> numpy.ndarray:
+        if upscale_amount == 1:
+            return image
+        if upscale_amount < 1 and interpolation != cv2.INTER_NEAREST:  # type: ignore
+            interpolation = cv2.INTER_AREA  # type: ignore
+        height, width = image.shape[:2]
+        size = (max(1, round(width * upscale_amount)), max(1, round(height * upscale_amount)))
+        return cv2.resize(image, size, interpolation=interpolation)  # type: ignore
+
+    def convert_to_grayscale(self, image: numpy.ndarray) -> numpy.ndarray:
+        if image.ndim == 2:
             return image
+        return cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)  # type: ignore
+
+    def threshold_image(self, config_dict: dict, image: numpy.ndarray) -> numpy.ndarray:
+        method = config_dict["ocr_settings"]["thresholding_method"]
+        if method == "otsu":
+            return cv2.threshold(image, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]  # type: ignore
+        elif method == "adaptive":
+            return cv2.adaptiveThreshold(  # type: ignore
+                image,
+                255,
+                cv2.ADAPTIVE_THRESH_MEAN_C,  # type: ignore
+                cv2.THRESH_BINARY,  # type: ignore
+                31,
+                10,
+            )
         else:
-            opencv_image = self.smart_convert_to_opencv(image)
-            opencv_image = cv2.cvtColor(opencv_image, cv2.COLOR_BGR2GRAY)  # type: ignore
-            opencv_image = cv2.threshold(  # type: ignore
-                opencv_image, config_dict["ocr_settings"]["thresholding_value"], 255, cv2.THRESH_BINARY  # type: ignore
-            )[1]
-            return self.opencv_to_pillow(opencv_image)
-
-    def smart_convert_to_pillow(self, image: Union[numpy.ndarray, Image.Image]) -> Image.Image:
-        if isinstance(image, numpy.ndarray):
-            image = self.opencv_to_pillow(image)
+            return self.sauvola_threshold(image)
+
+    def sauvola_threshold(self, image: numpy.ndarray) -> numpy.ndarray:
+        binary_image = numpy.empty(image.shape, image.dtype)
+        sauvola = doxapy.Binarization(doxapy.Binarization.Algorithms.SAUVOLA)
+        sauvola.initialize(numpy.ascontiguousarray(image))
+        # the window is sized for native resolution text
+        sauvola.to_binary(binary_image, {"window": 25, "k": 0.2})
+        return binary_image
+
+    def threshold_and_invert_image(self, config_dict: dict, image: numpy.ndarray, invert: bool) -> numpy.ndarray:
+        """Thresholds and, if needed, inverts the grayscale image in a single lookup table pass"""
+        lookup_table = numpy.where(numpy.arange(256) > config_dict["ocr_settings"]["thresholding_value"], 255, 0)
+        if invert:
+            lookup_table = 255 - lookup_table
+        return cv2.LUT(image, lookup_table.astype(numpy.uint8))  # type: ignore
+
+    def invert_image(self, image: numpy.ndarray, invert: bool) -> numpy.ndarray:
+        if invert:
+            return cv2.bitwise_not(image)  # type: ignore
         return image
 
-    def smart_convert_to_opencv(self, image: Union[numpy.ndarray, Image.Image]) -> numpy.ndarray:
-        if isinstance(image, Image.Image):
-            image = self.pillow_to_opencv(image)
-        return image
+    def detect_inversion(self, config_dict: dict, timings: dict[str, float], cache_key: tuple, detector, *args) -> bool:
+        """Decides whether to invert, the detector only runs for smart inversion and its result is cached"""
+        return self.should_invert(
+            config_dict, lambda: self.run_stage("detect_inversion", timings, detector, *args, cache_key=cache_key)
+        )
 
-    def smart_invert_image(self, config_dict: dict, image: Image.Image) -> Image.Image:
+    def should_invert(self, config_dict: dict, is_dominant_color_dark: Callable[[], bool]) -> bool:
+        if "force_inversion" in config_dict:
+            # variants are processed concurrently, so they must not touch self.inverted
+            return config_dict["force_inversion"]
         if config_dict.get("invert_color", False):
             if self.inverted:
                 print("forcibly not inverting")
-                return image
+                return False
             else:
                 print("forcibly inverting")
-                return ImageOps.invert(image)
-        else:
-            self.inverted = False
-        if config_dict["ocr_settings"]["smart_image_inversion"]:
-            colors = sorted(image.getcolors(image.size[0] * image.size[1]))
-            if isinstance(colors[-1][-1], int):
-                if colors[-1][-1] < 128:
-                    self.inverted = True
-                    image = ImageOps.invert(image)
-            else:
-                colors = cast(list[tuple[int, tuple[int, int, int]]], colors)
-                _, (r, g, b) = colors[-1]
-
-                if r < 128 and g < 128 and b < 128:
-                    self.inverted = True
-                    image = ImageOps.invert(image)
-
-        return image
-
-    # both from: https://stackoverflow.com/a/48602446/8825153
-    def opencv_to_pillow(self, opencv_image: numpy.ndarray) -> Image.Image:
-        color_coverted = cv2.cvtColor(opencv_image, cv2.COLOR_BGR2RGB)  # type: ignore
-        return Image.fromarray(color_coverted)
-
-    def pillow_to_opencv(self, pillow_image: Image.Image) -> numpy.ndarray:
-        numpy_image = numpy.array(pillow_image)
-        return cv2.cvtColor(numpy_image, cv2.COLOR_RGB2BGR)  # type: ignore
-
-    def pillow_to_doxa(self, pillow_image: Image.Image) -> numpy.ndarray:
-        return numpy.array(pillow_image.convert("L"))
-
-    def doxa_to_pillow(self, doxa_image: numpy.ndarray) -> Image.Image:
-        return Image.fromarray(doxa_image)
+                return True
+        self.inverted = config_dict["ocr_settings"]["smart_image_inversion"] and is_dominant_color_dark()
+        return self.inverted
+
+    def is_mostly_black_after_thresholding(self, image: numpy.ndarray, thresholding_value: int) -> bool:
+        grayscale_image = self.convert_to_grayscale(image)
+        black_pixels = self.get_histogram(grayscale_image)[: thresholding_value + 1].sum()
+        return bool(black_pixels > grayscale_image.size - black_pixels)
+
+    def is_dominant_color_dark(self, image: numpy.ndarray) -> bool:
+        if image.ndim == 2:
+            histogram = self.get_histogram(image)
+            # on a tie the brighter value wins, like with the sorted Image.getcolors result
+            return 255 - int(numpy.argmax(histogram[::-1])) < 128
+        # 16 levels per channel keep the 128 boundary exact and the histogram at 4096 bins
+        histogram = cv2.calcHist([image], [0, 1, 2], None, [16, 16, 16], [0, 256, 0, 256, 0, 256])  # type: ignore
+        r, g, b = numpy.unravel_index(histogram.size - 1 - int(numpy.argmax(histogram.ravel()[::-1])), histogram.shape)
+        return bool(r < 8 and g < 8 and b < 8)
+
+    def get_histogram(self, image: numpy.ndarray) -> numpy.ndarray:
+        # unlike numpy.bincount this doesn't widen every pixel to int64 first
+        return cv2.calcHist([image], [0], None, [256], [0, 256]).ravel()  # type: ignore
 
 
 def process_text(text: str):
@@ -1566,21 +3423,19 @@ def process_text(text: str):
         pyperclip.copy(text)
 
 
-def capture_desktop(app: QApplication):
-    desktop_pixmap = QPixmap(app.screens()[0].virtualSize())
-
-    painter = QPainter(desktop_pixmap)
-    for screen in app.screens():
-        painter.drawPixmap(
-            screen.geometry().topLeft(),
-            screen.grabWindow(0),  # type: ignore
-        )
-    return desktop_pixmap
+def capture_screen(screen: QScreen) -> QPixmap:
+    return screen.grabWindow(0)  # type: ignore
 
 
 class SelectorWidget(QDialog):
+    """Covers only the screens that were captured, starting with the one under the cursor"""
+
+    BACKDROP_DIM_COLOR = QColor.fromRgb(0, 0, 0, 120)
+
     def __init__(self, app: QApplication):
         super().__init__()
+        self.created_at = time.perf_counter()
+        self.overlay_shown = False
         if platform.system() == "Linux":
             self.setWindowFlags(
                 Qt.FramelessWindowHint  # type: ignore
@@ -1595,47 +3450,164 @@ class SelectorWidget(QDialog):
                 Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint | Qt.WindowFullscreenButtonHint  # type: ignore
             )
 
-        self.setGeometry(app.screens()[0].virtualGeometry())
-        self.desktopPixmap = capture_desktop(app)
+        self.app = app
+        self.screen_pixmaps: dict[QScreen, QPixmap] = {}
+        self.captured_geometry = QRect()
+        # the dimmed screens, rendered once per capture instead of on every paint
+        self.backdrop: Optional[QPixmap] = None
+        cursor_screen = app.screenAt(QCursor.pos()) or app.primaryScreen()
+        self.capture_screens_in(cursor_screen.geometry())
         self.selectedRect = QRect()
         self.selectedPixmap = None
 
         self.coordinates = Rectangle()
 
+    def capture_screens_in(self, rect: QRect):
+        """Grabs the screens touching rect that are not captured yet and grows the overlay over them"""
+        # screens under the overlay can't be grabbed anymore, so everything it will cover is grabbed first
+        while True:
+            new_screens = [
+                screen
+                for screen in self.app.screens()
+                if screen not in self.screen_pixmaps and screen.geometry().intersects(rect)
+            ]
+            if not new_screens:
+                break
+            for screen in new_screens:
+                self.screen_pixmaps[screen] = capture_screen(screen)
+                self.captured_geometry = self.captured_geometry.united(screen.geometry())
+                logger.debug(f"captured screen {screen.name()}")
+            rect = self.captured_geometry
+            self.backdrop = None
+        if self.geometry() != self.captured_geometry:
+            self.setGeometry(self.captured_geometry)
+            self.update()
+
+    def render_backdrop(self) -> QPixmap:
+        device_pixel_ratio = self.devicePixelRatioF()
+        backdrop = QPixmap(self.captured_geometry.size() * device_pixel_ratio)
+        backdrop.setDevicePixelRatio(device_pixel_ratio)
+        backdrop.fill(Qt.black)  # type: ignore
+        painter = QPainter(backdrop)
+        for screen, pixmap in self.screen_pixmaps.items():
+            painter.drawPixmap(self.to_local(screen.geometry()).topLeft(), pixmap)
+        painter.fillRect(backdrop.rect(), self.BACKDROP_DIM_COLOR)
+        painter.end()
+        return backdrop
+
+    def to_local(self, rect: QRect) -> QRect:
+        return rect.translated(-self.captured_geometry.topLeft())
+
+    def selection_outline(self) -> QRect:
+        """The local area covered by the selection and its outline"""
+        if self.selectedRect.isNull():
+            return QRect()
+        return self.to_local(self.selectedRect.normalized()).adjusted(-1, -1, 2, 2)
+
     def keyPressEvent(self, event):
         if event.key() in [Qt.Key_Escape]:
             self.reject()
 
     def mousePressEvent(self, event: QMouseEvent):
-        self.selectedRect.setTopLeft(event.globalPosition().toPoint())
+        self.selectedRect = QRect(event.globalPosition().toPoint(), event.globalPosition().toPoint())
+        self.update(self.selection_outline())
         self.coordinates.x1 = event.globalPosition().x()
         self.coordinates.y1 = event.globalPosition().y()
 
     def mouseMoveEvent(self, event: QMouseEvent) -> None:
+        previous_outline = self.selection_outline()
         self.selectedRect.setBottomRight(event.globalPosition().toPoint())
-        self.update()
+        if not self.captured_geometry.contains(self.selectedRect.normalized()):
+            self.capture_screens_in(self.selectedRect.normalized())
+        # only the area the selection left or entered has to be repainted
+        self.update(previous_outline.united(self.selection_outline()))
 
     def mouseReleaseEvent(self, event: QMouseEvent) -> None:
-        self.selectedPixmap = self.desktopPixmap.copy(self.selectedRect.normalized())
+        self.selectedRect.setBottomRight(event.globalPosition().toPoint())
+        self.capture_screens_in(self.selectedRect.normalized())
+        self.selectedPixmap = self.compose_selection(self.selectedRect.normalized())
         self.coordinates.x2 = event.globalPosition().x()
         self.coordinates.y2 = event.globalPosition().y()
         self.accept()
 
-    def paintEvent(self, _: QPaintEvent) -> None:
+    def compose_selection(self, rect: QRect) -> QPixmap:
+        """Copies rect (in global coordinates) out of the captured screens, at their physical resolution"""
+        pixmaps = {
+            screen: pixmap for screen, pixmap in self.screen_pixmaps.items() if screen.geometry().intersects(rect)
+        }
+        device_pixel_ratio = max(
+            (pixmap.devicePixelRatio() for pixmap in pixmaps.values()), default=self.devicePixelRatioF()
+        )
+        selection = QPixmap(rect.size() * device_pixel_ratio)
+        selection.setDevicePixelRatio(device_pixel_ratio)
+        selection.fill(Qt.black)  # type: ignore
+        painter = QPainter(selection)
+        for screen, pixmap in pixmaps.items():
+            painter.drawPixmap(screen.geometry().topLeft() - rect.topLeft(), pixmap)
+        painter.end()
+        return selection
+
+    def paintEvent(self, event: QPaintEvent) -> None:
+        if self.backdrop is None:
+            self.backdrop = self.render_backdrop()
         painter = QPainter(self)
-        painter.drawPixmap(0, 0, self.desktopPixmap)
-        path = QPainterPath()
-        painter.fillPath(path, QColor.fromRgb(255, 255, 255, 200))
+        dirty_rect = event.rect()
+        draw_pixmap_part(painter, dirty_rect, self.backdrop, QPoint(0, 0))
+        if not self.overlay_shown:
+            self.overlay_shown = True
+            metrics.observe("time_to_overlay", time.perf_counter() - self.created_at)
+        if self.selectedRect.isNull():
+            return
+        # the selection shows the screens undimmed
+        # the overlay doesn't necessarily start at the origin of the virtual desktop, so rects are made local
+        selection = self.to_local(self.selectedRect.normalized())
+        for screen, pixmap in self.screen_pixmaps.items():
+            screen_rect = self.to_local(screen.geometry())
+            draw_pixmap_part(painter, dirty_rect & selection & screen_rect, pixmap, screen_rect.topLeft())
         painter.setPen(Qt.red)
-        painter.drawRect(self.selectedRect)
-
-
-def convert_qpixmap_to_pil_image(pixmap: QPixmap):
-    q_image = pixmap.toImage()
-    buffer = QBuffer()
-    buffer.open(QBuffer.ReadWrite)  # type: ignore
-    q_image.save(buffer, "PNG")  # type: ignore
-    return Image.open(io.BytesIO(buffer.data()))  # type: ignore
+        painter.drawRect(selection)
+
+
+def draw_pixmap_part(painter: QPainter, target: QRect, pixmap: QPixmap, pixmap_position: QPoint):
+    """Draws only the part of pixmap (placed at pixmap_position) that lies in target"""
+    if target.isEmpty():
+        return
+    device_pixel_ratio = pixmap.devicePixelRatio()
+    source = target.translated(-pixmap_position)
+    painter.drawPixmap(
+        target,
+        pixmap,
+        QRect(
+            round(source.x() * device_pixel_ratio),
+            round(source.y() * device_pixel_ratio),
+            round(source.width() * device_pixel_ratio),
+            round(source.height() * device_pixel_ratio),
+        ),
+    )
+
+
+def convert_qpixmap_to_pil_image(pixmap: QPixmap) -> Image.Image:
+    return convert_qimage_to_pil_image(pixmap.toImage())
+
+
+# 32 bit QImage pixels are native endian 0xAARRGGBB integers
+QIMAGE_RAW_MODE = "BGRX" if sys.byteorder == "little" else "XRGB"
+
+
+def convert_qimage_to_pil_image(q_image: QImage) -> Image.Image:
+    """Copies the pixels straight out of the image, at its full device pixel resolution"""
+    if q_image.format() not in (QImage.Format_RGB32, QImage.Format_ARGB32):  # type: ignore
+        q_image = q_image.convertToFormat(QImage.Format_RGB32)  # type: ignore
+    # rows can be padded, so the image's own stride is passed on
+    return Image.frombuffer(
+        "RGB",
+        (q_image.width(), q_image.height()),
+        q_image.constBits(),  # type: ignore
+        "raw",
+        QIMAGE_RAW_MODE,
+        q_image.bytesPerLine(),
+        1,
+    )
 
 
 class AudioWorker:
@@ -1791,4 +3763,6 @@ def get_loopback_device(mics):
 
 
 if __name__ == "__main__":
+    # frozen batch workers start the exe again, this runs the worker instead of the cli in them
+    multiprocessing.freeze_support()
     typer_app()
@@ -0,0 +1,64 @@
+from typing import Optional
+
+import cv2
+import numpy
+import pytest
+
+from ocr_tool import TextFingerprint
+
+TOLERANCE_CELLS = 1
+TEXT = "The quick brown fox"
+
+
+def render_frame(text: str, cursor: bool = False, eyes_open: Optional[bool] = None) -> numpy.ndarray:
+    image = numpy.full((140, 720), 230, dtype=numpy.uint8)
+    cv2.putText(image, text, (160, 80), cv2.FONT_HERSHEY_SIMPLEX, 1.0, 20, 2, cv2.LINE_AA)
+    if cursor:
+        # a "next" marker right after the text
+        cv2.fillPoly(image, [numpy.array([[500, 66], [516, 66], [508, 82]], numpy.int32)], 20, cv2.LINE_AA)
+    if eyes_open is not None:
+        # a character portrait next to the text that blinks
+        cv2.ellipse(image, (70, 70), (45, 60), 0, 0, 360, 20, -1, cv2.LINE_AA)
+        for x in (55, 85):
+            if eyes_open:
+                cv2.circle(image, (x, 55), 6, 230, -1, cv2.LINE_AA)
+            else:
+                cv2.line(image, (x - 7, 55), (x + 7, 55), 230, 2, cv2.LINE_AA)
+        cv2.ellipse(image, (70, 95), (15, 6), 0, 0, 180, 230, 2, cv2.LINE_AA)
+    return image
+
+
+def matches(previous_frame: numpy.ndarray, frame: numpy.ndarray) -> bool:
+    # compared the way auto ocr does, measured like the last ocr's fingerprint
+    previous_fingerprint = TextFingerprint(previous_frame)
+    return TextFingerprint(frame, reference=previous_fingerprint).matches(previous_fingerprint, TOLERANCE_CELLS)
+
+
+def test_same_text_matches():
+    assert matches(render_frame(TEXT), render_frame(TEXT))
+
+
+def test_capture_noise_is_ignored():
+    image = render_frame(TEXT)
+    noisy = numpy.clip(image.astype(int) + numpy.random.default_rng(0).integers(-3, 4, image.shape), 0, 255)
+    assert matches(image, noisy.astype(numpy.uint8))
+
+
+def test_blinking_cursor_is_ignored():
+    assert matches(render_frame(TEXT), render_frame(TEXT, cursor=True))
+    assert matches(render_frame(TEXT, cursor=True), render_frame(TEXT))
+
+
+def test_blinking_portrait_is_ignored():
+    assert matches(render_frame(TEXT, eyes_open=True), render_frame(TEXT, eyes_open=False))
+
+
+@pytest.mark.parametrize(
+    "changed_text", ["The quick brown fix", "The quick brawn fox", "Tha quick brown fox", "The quick crown fox"]
+)
+def test_single_changed_glyph_is_detected(changed_text):
+    assert not matches(render_frame(TEXT), render_frame(changed_text))
+
+
+def test_changed_glyph_next_to_cursor_is_detected():
+    assert not matches(render_frame(TEXT, cursor=True), render_frame("The quick brown fix", cursor=True))